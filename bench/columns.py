@@ -0,0 +1,88 @@
+"""
+Time ordering and aggregating a container listing by sorting records with
+Python key functions, against doing the same with the monitor's column
+store, with NumPy when it is installed. Also time sorting the monitor's
+listing from scratch against moving a single changed container in it.
+
+    python bench/columns.py
+"""
+import os
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from console import columns
+from console.state import ContainerMonitor, status_state
+
+SIZES = (10000, 50000, 100000)
+DAY = 24 * 60 * 60
+
+
+def containers(count):
+    now = int(time.time())
+    return [{
+        'Id': "%064x" % idx,
+        'Image': 'registry.example.com/service-%d:1.%d' % (idx % 40, idx % 3),
+        'Names': ['/service-%d' % idx],
+        'Status': 'Up %d hours' % (idx % 48) if idx % 4 else 'Exited (0) %d days ago' % (idx % 30),
+        'Command': '/bin/sh -c serve',
+        'Created': now - idx * 600,
+        'Labels': {},
+    } for idx in range(count)]
+
+
+def timed(fn, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.time()
+        fn()
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def with_records(records, edges):
+    ordered = sorted(records, key=lambda x: (x.age, x.image, x.status))
+    ordered.sort(key=lambda x: 'Exited' in x.status)
+    states = Counter(status_state(x.status) for x in records)
+    images = Counter(x.image for x in records)
+    ages = [0] * (len(edges) - 1)
+    for record in records:
+        for bucket in range(len(edges) - 1):
+            if edges[bucket] <= record.created < edges[bucket + 1]:
+                ages[bucket] += 1
+    return ordered, states, images, ages
+
+
+def with_store(store, order, edges):
+    ordered = store.take(store.order(order))
+    return ordered, store.counts('state'), store.counts('image'), store.histogram('created', edges)
+
+
+def main():
+    monitor = ContainerMonitor(None, None)
+    now = int(time.time())
+    edges = [now - days * DAY for days in (365, 30, 7, 1, 0)] + [now + 1]
+    print("numpy: %s" % ('yes' if columns.numpy is not None else 'no'))
+    print("%10s %12s %12s %12s %12s" % (
+        'containers', 'records ms', 'store ms', 'reorder ms', 'update ms',
+    ))
+    for count in SIZES:
+        snapshot = monitor.process_containers(containers(count))
+        records = snapshot.values()
+        listing = monitor.listing.reorder(records)
+        old = records[count // 2]
+        new = old.replace(status=u'Exited (137) 1 seconds ago')
+        print("%10d %12.1f %12.1f %12.1f %12.1f" % (
+            count,
+            timed(lambda: with_records(records, edges)),
+            timed(lambda: with_store(monitor.store.rebuild(records), monitor.order, edges)),
+            timed(lambda: monitor.listing.reorder(records)),
+            timed(lambda: listing.update([old], [new])),
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Measure input-to-paint latency of the container pane while a list of 20k
+containers, a twentieth of them changed, is refreshed once a second.
+
+A key press is fed to the pane every 20ms; its latency runs from the moment
+it was due until the frame that follows it has been rendered. With `inline`
+every stage runs on the reactor thread as if there was no executor, with
+`pipeline` the executor lanes are used as they are in the application.
+
+    python bench/latency.py [inline|pipeline]
+"""
+import os
+import sys
+import time
+
+from twisted.internet import defer, reactor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from console.app import app
+from console.scheduler import FrameScheduler, IdleCollector
+from console.state import DockerState
+
+CONTAINERS = 20000
+DURATION = 8
+INPUT_INTERVAL = 0.02
+REFRESH_INTERVAL = 1
+SIZE = (160, 50)
+
+
+class FakeClient(object):
+    def __init__(self):
+        self.calls = 0
+
+    def containers(self, all=False, filters=None, limit=-1):
+        self.calls += 1
+        return [{
+            'Id': "%064x" % idx,
+            'Image': 'image-%d:latest' % (idx % 50),
+            'Names': ['/container-%d' % idx],
+            # a twentieth of the containers change on every refresh
+            'Status': 'Up %d minutes' % ((self.calls + idx) // 20),
+            'Command': '/bin/sh -c serve',
+            'Created': 1433160000 + idx,
+            'Labels': {'team': 'team-%d' % (idx % 5)},
+        } for idx in range(CONTAINERS)]
+
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct))] * 1000
+
+
+def main():
+    mode = sys.argv[1] if len(sys.argv) > 1 else 'pipeline'
+    app.state = DockerState('unix://var/run/docker.sock', '1.18', REFRESH_INTERVAL)
+    monitor = app.state.containers
+    monitor.client = FakeClient()
+    if mode == 'inline':
+        app.state.executor.submit = (
+            lambda lane, fn, *args, **kwargs: defer.maybeDeferred(fn, *args, **kwargs)
+        )
+
+    from console.ui.containers.pane import ContainerPane
+    pane = ContainerPane()
+
+    pending = []
+    latencies = []
+    canvas = []
+
+    def draw():
+        # like the screen, hold on to the last canvas so unchanged rows are
+        # served from urwid's canvas cache
+        canvas[:] = [pane.render(SIZE, focus=True)]
+        now = time.time()
+        latencies.extend(now - due for due in pending)
+        del pending[:]
+
+    app.frames = FrameScheduler(draw, fps=60)
+    if mode == 'pipeline':
+        IdleCollector(app.frames).start()
+
+    def press(due, key):
+        pending.append(due)
+        pane.keypress(SIZE, key)
+        # urwid's main loop redraws after every input
+        app.redraw()
+        due += INPUT_INTERVAL
+        reactor.callLater(max(0, due - time.time()), press, due, 'up' if key == 'down' else 'down')
+
+    def refresh():
+        monitor.poller.refresh()
+        reactor.callLater(REFRESH_INTERVAL, refresh)
+
+    def report():
+        print("%-8s %6d inputs  p50 %6.1fms  p95 %6.1fms  max %6.1fms  (%d refreshes, %d shown)" % (
+            mode, len(latencies),
+            percentile(latencies, .5), percentile(latencies, .95), max(latencies) * 1000,
+            monitor.client.calls, len(pane.listing.walker.records),
+        ))
+        reactor.stop()
+
+    monitor.poller.running = True
+    refresh()
+    reactor.callLater(0.5, press, time.time() + 0.5, 'down')
+    reactor.callLater(DURATION, report)
+    reactor.run()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Report the memory held per container by a monitor snapshot, comparing the
+plain dictionaries records used to be with the compact Container records.
+
+Sizes are measured by walking each snapshot and summing sys.getsizeof over
+every object reachable from it, counting shared objects such as interned
+strings once.
+
+    python bench/memory.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from console.records import Record
+from console.state import ContainerMonitor
+
+SIZES = (10000, 50000, 100000)
+
+
+def containers(count):
+    now = int(time.time())
+    return [{
+        'Id': u"%064x" % idx,
+        'Image': u'registry.example.com/team-%d/service-%d:1.%d' % (idx % 5, idx % 40, idx % 3),
+        'Names': [u'/service-%d-%d' % (idx % 40, idx)],
+        'Status': u'Up %d hours' % (idx % 48) if idx % 4 else u'Exited (0) %d days ago' % (idx % 30),
+        'Command': u'/usr/local/bin/entrypoint.sh serve --port %d' % (8000 + idx % 10),
+        'Created': now - idx * 60,
+        'Labels': {
+            u'com.example.team': u'team-%d' % (idx % 5),
+            u'com.example.tier': [u'web', u'worker', u'db'][idx % 3],
+        },
+    } for idx in range(count)]
+
+
+def copy(string):
+    return (string + u' ')[:-1]
+
+
+def as_dict(record):
+    # the shape records had before they were Container objects, with every
+    # string decoded separately as it comes out of the JSON response
+    return {
+        'age': record.age,
+        'id': unicode(record.id),
+        'image': copy(record.image),
+        'names': [unicode(name) for name in record.names],
+        'status': copy(record.status),
+        'command': copy(record.command),
+        'labels': dict((copy(k), copy(v)) for k, v in record.labels),
+    }
+
+
+def deep_size(root):
+    seen = set()
+    stack = [root]
+    size = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif isinstance(obj, Record):
+            stack.extend(obj.values())
+    return size
+
+
+def main():
+    monitor = ContainerMonitor(None, None)
+    print("%10s %16s %16s" % ('containers', 'dict bytes/each', 'record bytes/each'))
+    for count in SIZES:
+        snapshot = monitor.process_containers(containers(count))
+        dicts = dict(
+            (record['id'], record)
+            for record in (as_dict(record) for record in snapshot.values())
+        )
+        print("%10d %16d %16d" % (
+            count,
+            deep_size(dicts) // count,
+            deep_size(snapshot) // count,
+        ))
+
+
+if __name__ == '__main__':
+    main()
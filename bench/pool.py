@@ -0,0 +1,161 @@
+"""
+Measure Docker API request latency while the container list is polled at
+4 Hz and several threads inspect containers, comparing one docker.Client
+shared by every thread with the ClientPool used by DockerState.
+
+Without arguments a minimal keep-alive stand-in for the daemon is served on
+a temporary unix socket; pass a host to measure against a real daemon:
+
+    python bench/pool.py [unix://var/run/docker.sock]
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+try:
+    from BaseHTTPServer import BaseHTTPRequestHandler
+    from SocketServer import ThreadingMixIn, UnixStreamServer
+except ImportError:
+    from http.server import BaseHTTPRequestHandler
+    from socketserver import ThreadingMixIn, UnixStreamServer
+
+import docker
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from console.pool import ClientPool
+
+CONTAINERS = 200
+DURATION = 10
+POLL_RATE = 4
+INSPECTORS = 4
+INSPECT_PAUSE = 0.05
+
+
+class DaemonHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def address_string(self):
+        return 'unix'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        path = self.path.split('?')[0]
+        if path.endswith('/_ping'):
+            body = 'OK'
+        elif path.endswith('/containers/json'):
+            body = json.dumps(self.server.containers)
+        else:
+            body = json.dumps(self.server.inspect)
+        body = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class Daemon(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path):
+        UnixStreamServer.__init__(self, path, DaemonHandler)
+        self.connections = 0
+        self.containers = [{
+            'Id': "%064x" % idx,
+            'Image': 'image-%d' % (idx % 20),
+            'Names': ['/container-%d' % idx],
+            'Status': 'Up 5 minutes',
+            'Command': '/bin/sh -c serve',
+            'Created': 1433160000,
+        } for idx in range(CONTAINERS)]
+        self.inspect = {'Id': "%064x" % 0, 'Config': {'Env': ['A=%d' % i for i in range(50)]}}
+
+    def get_request(self):
+        self.connections += 1
+        return UnixStreamServer.get_request(self)
+
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct))] * 1000
+
+
+def run(call):
+    stop = time.time() + DURATION
+    polls, inspects = [], []
+
+    def timed(samples, name, *args):
+        start = time.time()
+        call(name, *args)
+        samples.append(time.time() - start)
+
+    def poller():
+        while time.time() < stop:
+            timed(polls, 'containers', True)
+            time.sleep(1.0 / POLL_RATE)
+
+    def inspector():
+        while time.time() < stop:
+            timed(inspects, 'inspect_container', "%064x" % 0)
+            time.sleep(INSPECT_PAUSE)
+
+    workers = [threading.Thread(target=poller)]
+    workers += [threading.Thread(target=inspector) for _ in range(INSPECTORS)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return polls, inspects
+
+
+def main():
+    host = sys.argv[1] if len(sys.argv) > 1 else None
+    daemon = tmpdir = None
+    if host is None:
+        tmpdir = tempfile.mkdtemp()
+        path = os.path.join(tmpdir, 'docker.sock')
+        daemon = Daemon(path)
+        server = threading.Thread(target=daemon.serve_forever)
+        server.daemon = True
+        server.start()
+        host = 'unix://' + path
+
+    def make_client():
+        return docker.Client(base_url=host, version='1.18')
+
+    shared = make_client()
+    pool = ClientPool(make_client, size=INSPECTORS + 1)
+    strategies = (
+        ('shared', lambda name, *args: getattr(shared, name)(*args)),
+        ('pooled', pool.call),
+    )
+
+    print("%-8s %10s %10s %12s %12s %12s" % (
+        'client', 'polls', 'inspects', 'poll p50/95', 'insp p50/95', 'connections'))
+    for name, call in strategies:
+        before = daemon.connections if daemon else 0
+        polls, inspects = run(call)
+        connections = daemon.connections - before if daemon else -1
+        print("%-8s %10d %10d %5.2f/%5.2f %5.2f/%5.2f %12d" % (
+            name, len(polls), len(inspects),
+            percentile(polls, .5), percentile(polls, .95),
+            percentile(inspects, .5), percentile(inspects, .95),
+            connections,
+        ))
+
+    shared.close()
+    pool.close()
+    if daemon:
+        daemon.shutdown()
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
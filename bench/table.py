@@ -0,0 +1,118 @@
+"""
+Compare the cost of refreshing a containers table by clearing and rebuilding
+every row in a SimpleListWalker against swapping the records of the keyed,
+virtualized Table. Each refresh changes the status of 1% of the rows and
+renders a 50 line viewport.
+
+    python bench/table.py
+"""
+import gc
+import os
+import sys
+import time
+
+import urwid
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from console.widgets.table import Table
+
+SCHEMA = (
+    {'name': 'Id'},
+    {'name': 'Image'},
+    {'name': 'Command'},
+    {'name': 'Status'},
+    {'name': 'Names'},
+)
+SIZE = (160, 50)
+REFRESHES = 10
+
+
+def make_rowdefs(count, tick):
+    rowdefs = []
+    for idx in range(count):
+        status = "Up %d minutes" % (tick if idx % 100 == 0 else 5)
+        rowdefs.append(("%064x" % idx, {
+            'Id': ("%064x" % idx)[:12],
+            'Image': "image-%d" % (idx % 20),
+            'Command': "/bin/sh -c serve",
+            'Status': status,
+            'Names': ["/container-%d" % idx],
+        }))
+    return rowdefs
+
+
+class RebuiltTable(urwid.ListBox):
+    def __init__(self):
+        self.table = Table(SCHEMA, header=True)
+        self.walker = urwid.SimpleListWalker([self.table.header])
+        super(RebuiltTable, self).__init__(self.walker)
+
+    def refresh(self, rowdefs):
+        self.walker[1:] = []
+        for key, rowdef in rowdefs:
+            self.walker.append(self.table.create_row(rowdef))
+
+    def built(self):
+        return len(self.walker) - 1
+
+    def retain(self):
+        return list(self.walker)
+
+
+class VirtualTable(Table):
+    def __init__(self):
+        super(VirtualTable, self).__init__(SCHEMA, header=True)
+
+    def refresh(self, rowdefs):
+        self.set_records(rowdefs)
+
+    def built(self):
+        return len(self.walker.rows)
+
+    def retain(self):
+        return list(self.walker.rows.values())
+
+
+def new_objects(fn):
+    gc.collect()
+    before = set(id(o) for o in gc.get_objects())
+    fn()
+    return sum(1 for o in gc.get_objects() if id(o) not in before)
+
+
+def measure(table_cls, count):
+    table = table_cls()
+    table.refresh(make_rowdefs(count, 0))
+    table.render(SIZE)
+    ticks = [make_rowdefs(count, tick) for tick in range(1, REFRESHES + 2)]
+
+    elapsed = 0.0
+    for rowdefs in ticks[:REFRESHES]:
+        start = time.time()
+        table.refresh(rowdefs)
+        table.render(SIZE)
+        elapsed += time.time() - start
+
+    # keep the replaced rows alive so their ids are not reused
+    retained = table.retain()
+    allocated = new_objects(lambda: table.refresh(ticks[-1]))
+    del retained
+    return elapsed / REFRESHES * 1000, allocated, table.built()
+
+
+def main():
+    print("%-10s %8s %12s %16s %12s" % (
+        'strategy', 'rows', 'ms/refresh', 'objects/refresh', 'rows built'))
+    runs = (
+        ('rebuild', RebuiltTable, (1000, 10000)),
+        ('virtual', VirtualTable, (1000, 10000, 100000)),
+    )
+    for name, table_cls, counts in runs:
+        for count in counts:
+            ms, allocated, built = measure(table_cls, count)
+            print("%-10s %8d %12.2f %16d %12d" % (name, count, ms, allocated, built))
+
+
+if __name__ == '__main__':
+    main()
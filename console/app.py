@@ -1,11 +1,10 @@
 import urwid
 
-import docker
-
 from zope.interface import Interface, Attribute
 from twisted.python.components import proxyForInterface
 
 from console.palette import palette
+from console.scheduler import FrameScheduler, IdleCollector
 from console.state import DockerState
 
 class IEventLoop(Interface):
@@ -65,10 +64,19 @@ class ConsoleApp(proxyForInterface(IEventLoop)):
         self.client = None
         self.root = None
         self.state = None
+        self.frames = None
+        self.collector = None
 
     def init(self, options, root_cls):
-        self.state = DockerState(options.host, '1.18', options.freq)
-        self.client = docker.Client(base_url=options.host, version='1.18')
+        self.state = DockerState(
+            options.host,
+            options.api_version,
+            options.freq,
+            options.pool_size,
+            options.limit,
+            options.cache_size,
+        )
+        self.client = self.state.client
         self.options = options
         self.root = root_cls()
         event_loop = urwid.TwistedEventLoop(manage_reactor=True)
@@ -78,6 +86,22 @@ class ConsoleApp(proxyForInterface(IEventLoop)):
             event_loop=event_loop,
         )
         super(ConsoleApp, self).__init__(loop)
+        self.frames = FrameScheduler(self.draw_screen, options.fps)
+        self.collector = IdleCollector(self.frames)
+        self.collector.start()
+        self.state.start()
+
+    def screen_size(self):
+        """
+        Return the (columns, rows) of the screen as of the last draw.
+        """
+        return self.original.screen_size or self.screen.get_cols_rows()
+
+    def redraw(self):
+        """
+        Mark the screen as dirty; it is drawn on the next frame.
+        """
+        self.frames.request()
 
 
 app = ConsoleApp()
@@ -0,0 +1,114 @@
+import time
+
+from collections import OrderedDict
+
+from twisted.internet import defer
+from twisted.python.failure import Failure
+
+
+class ResultCache(object):
+    """
+    A bounded LRU cache of the results of Deferred returning calls. Every
+    entry expires after its own ttl, or never if it is None. Concurrent
+    fetches of the same key share a single call, whose result is only kept
+    if the key wasn't invalidated while it ran.
+    """
+
+    def __init__(self, size=256, clock=time.time):
+        self.size = size
+        self.clock = clock
+        self.entries = OrderedDict()
+        self.pending = {}
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+
+    def stats(self):
+        return {
+            'size': len(self.entries),
+            'pending': len(self.pending),
+            'hits': self.hits,
+            'misses': self.misses,
+            'shared': self.shared,
+        }
+
+    def lookup(self, key):
+        """
+        Return (True, value) for a live entry of `key`, or (False, None).
+        """
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return False, None
+        value, expires = entry
+        if expires is not None and expires <= self.clock():
+            return False, None
+        self.entries[key] = entry
+        return True, value
+
+    def store(self, key, value, ttl):
+        expires = None if ttl is None else self.clock() + ttl
+        self.entries.pop(key, None)
+        self.entries[key] = (value, expires)
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+    def fetch(self, key, ttl, fn, *args, **kwargs):
+        """
+        Return a Deferred firing with the cached result for `key`, or with
+        the result of `fn(*args, **kwargs)`. Cancelling it only cancels the
+        call if nobody else is waiting for it.
+        """
+        found, value = self.lookup(key)
+        if found:
+            self.hits += 1
+            return defer.succeed(value)
+
+        waiter = defer.Deferred(lambda d: self.abandon(key, d))
+        call = self.pending.get(key)
+        if call is not None:
+            self.shared += 1
+            call[1].append(waiter)
+            return waiter
+
+        self.misses += 1
+        call = self.pending[key] = [None, [waiter]]
+        d = call[0] = fn(*args, **kwargs)
+        d.addBoth(self.resolve, key, ttl, call)
+        return waiter
+
+    def resolve(self, result, key, ttl, call):
+        if self.pending.get(key) is call:
+            del self.pending[key]
+            if not isinstance(result, Failure):
+                self.store(key, result, ttl)
+        for waiter in call[1]:
+            if waiter.called:
+                # cancelled after the key was invalidated
+                continue
+            if isinstance(result, Failure):
+                waiter.errback(result)
+            else:
+                waiter.callback(result)
+
+    def abandon(self, key, waiter):
+        call = self.pending.get(key)
+        if call is None or waiter not in call[1]:
+            return
+        call[1].remove(waiter)
+        if not call[1]:
+            del self.pending[key]
+            if call[0] is not None:
+                call[0].cancel()
+
+    def invalidate(self, *keys):
+        """
+        Drop the entries of `keys`. Results of calls still running for them
+        are passed on to their waiters but not kept.
+        """
+        for key in keys:
+            self.entries.pop(key, None)
+            self.pending.pop(key, None)
+
+    def clear(self):
+        self.entries.clear()
+        self.pending.clear()
@@ -12,7 +12,14 @@ from console.ui.layout import RootFrame
 @click.option('--host',
               envvar='DOCKER_HOST',
               default='unix://var/run/docker.sock')
+@click.option('--api-version', default='auto')
 @click.option('--freq', default=.25)
+@click.option('--limit', default=1000)
+@click.option('--pool-size', default=8)
+@click.option('--cache-size', default=256)
+@click.option('--prefetch', default=2)
+@click.option('--follow-rate', default=10)
+@click.option('--fps', default=30)
 @click.option('--debug', default=False)
 @click.pass_context
 def main(ctx, *args, **kwargs):
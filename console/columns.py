@@ -0,0 +1,201 @@
+"""
+A columnar copy of a monitor's snapshot, for ordering and aggregating
+large listings without comparing records in Python.
+
+Numeric fields are held in arrays and categorical fields, such as an image
+or a status, as arrays of integer codes into a list of their distinct
+values. When NumPy is installed the columns are viewed as NumPy arrays and
+sorts, selections and counts are vectorized; otherwise the same operations
+run over the arrays with the standard library.
+"""
+from array import array
+from bisect import bisect_right
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def as_numpy(column):
+    # a view of the array's memory; frombuffer refuses empty buffers
+    if not len(column):
+        return numpy.zeros(0, dtype=column.typecode)
+    return numpy.frombuffer(column, dtype=column.typecode)
+
+
+class Categories(object):
+    """
+    The distinct values of a categorical column, each with an integer code.
+    """
+
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def code(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def ranks(self):
+        """
+        Map each code to the position of its value in sorted order.
+        """
+        ranks = array('i', [0] * len(self.values))
+        order = sorted(range(len(self.values)), key=self.values.__getitem__)
+        for rank, code in enumerate(order):
+            ranks[code] = rank
+        return ranks
+
+
+class ColumnStore(object):
+    """
+    Holds the `numbers` and `categories` fields, each given as a function
+    of a record, of a list of records, one row per record in the order
+    given, along with a map of record keys to rows. A column is only built
+    the first time it is used.
+
+    A new snapshot is stored with `rebuild`, which leaves this store as it
+    is and returns a new one, so that it can run off the reactor thread.
+    """
+
+    def __init__(self, key, numbers, categories):
+        self.key = key
+        self.numbers = numbers
+        self.categories = categories
+        self.records = []
+        self.rows = {}
+        self.columns = {}
+        self.values = dict((name, Categories()) for name in categories)
+        self.ranked = {}
+
+    def __len__(self):
+        return len(self.records)
+
+    def rebuild(self, records):
+        """
+        Return a new store over `records`.
+        """
+        store = ColumnStore(self.key, self.numbers, self.categories)
+        store.records = list(records)
+        store.rows = dict(
+            (self.key(record), row)
+            for row, record in enumerate(store.records)
+        )
+        return store
+
+    def array(self, name):
+        column = self.columns.get(name)
+        if column is None:
+            if name in self.numbers:
+                field = self.numbers[name]
+                column = array('l', [field(record) for record in self.records])
+            else:
+                field = self.categories[name]
+                code = self.values[name].code
+                column = array('i', [code(field(record)) for record in self.records])
+            self.columns[name] = column
+        return column
+
+    def column(self, name):
+        """
+        Return column `name` as a NumPy array if NumPy is available.
+        """
+        column = self.array(name)
+        if numpy is not None:
+            return as_numpy(column)
+        return column
+
+    def sort_column(self, name):
+        """
+        Return the column whose order is the order of the values of `name`,
+        that is the rank of each row's value for categorical columns.
+        """
+        if name not in self.categories:
+            return self.column(name)
+        ranked = self.ranked.get(name)
+        if ranked is None:
+            column = self.column(name)
+            ranks = self.values[name].ranks()
+            if numpy is not None:
+                ranked = as_numpy(ranks)[column]
+            else:
+                ranked = array('i', [ranks[code] for code in column])
+            self.ranked[name] = ranked
+        return ranked
+
+    def order(self, keys, rows=None):
+        """
+        Return the permutation of `rows`, or of every row, that sorts them
+        by `keys`, a list of (column, descending) from the most significant.
+        Rows that compare equal keep their order.
+        """
+        if rows is None:
+            rows = range(len(self.records))
+        if not keys:
+            return list(rows)
+        if numpy is not None:
+            rows = numpy.asarray(rows, dtype=numpy.intp)
+            columns = []
+            for name, descending in reversed(keys):
+                column = self.sort_column(name)[rows]
+                columns.append(-column if descending else column)
+            return rows[numpy.lexsort(columns)].tolist()
+        rows = list(rows)
+        # successive stable sorts, from the least significant key
+        for name, descending in reversed(keys):
+            rows.sort(key=self.sort_column(name).__getitem__, reverse=descending)
+        return rows
+
+    def select(self, name, values):
+        """
+        Return the rows whose value of categorical column `name` is one of
+        `values`.
+        """
+        column = self.column(name)
+        codes = self.values[name].codes
+        wanted = [codes[value] for value in values if value in codes]
+        if numpy is not None:
+            return numpy.flatnonzero(numpy.in1d(column, wanted)).tolist()
+        wanted = set(wanted)
+        return [row for row, code in enumerate(column) if code in wanted]
+
+    def take(self, rows):
+        """
+        Return the records of `rows`, in that order.
+        """
+        records = self.records
+        return [records[row] for row in rows]
+
+    def counts(self, name):
+        """
+        Map each value of categorical column `name` to its number of rows.
+        """
+        column = self.column(name)
+        values = self.values[name].values
+        if numpy is not None:
+            counts = numpy.bincount(column, minlength=len(values)).tolist()
+        else:
+            counts = [0] * len(values)
+            for code in column:
+                counts[code] += 1
+        return dict((value, count) for value, count in zip(values, counts) if count)
+
+    def histogram(self, name, edges):
+        """
+        Count the rows whose value of numeric column `name` falls in each
+        interval between consecutive ascending `edges`, the lower bound
+        included.
+        """
+        column = self.column(name)
+        if numpy is not None:
+            buckets = numpy.searchsorted(numpy.asarray(edges), column, 'right')
+            counts = numpy.bincount(buckets, minlength=len(edges) + 1).tolist()
+        else:
+            counts = [0] * (len(edges) + 1)
+            for value in column:
+                counts[bisect_right(edges, value)] += 1
+        return counts[1:len(edges)]
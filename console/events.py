@@ -0,0 +1,139 @@
+import codecs
+import json
+import threading
+import time
+
+import urwid
+
+from twisted.internet import reactor
+
+
+class EventDecoder(object):
+    """
+    Incrementally decodes the stream of concatenated JSON objects sent by the
+    daemon's /events endpoint. Chunk boundaries do not have to line up with
+    object boundaries; partial objects are buffered until they complete.
+    """
+
+    def __init__(self):
+        self.buffer = u''
+        self.decoder = json.JSONDecoder()
+        # a multibyte character may be split across chunks
+        self.utf8 = codecs.getincrementaldecoder('utf-8')()
+
+    def feed(self, data):
+        if not isinstance(data, type(u'')):
+            data = self.utf8.decode(data)
+        buffer = self.buffer + data
+        events = []
+        while True:
+            buffer = buffer.lstrip()
+            if not buffer:
+                break
+            try:
+                event, end = self.decoder.raw_decode(buffer)
+            except ValueError:
+                break
+            events.append(event)
+            buffer = buffer[end:]
+        self.buffer = buffer
+        return events
+
+
+def event_action(event):
+    action = event.get('Action') or event.get('status') or ''
+    return action.split(':')[0].strip()
+
+
+def event_id(event):
+    actor = event.get('Actor') or {}
+    return actor.get('ID') or event.get('id')
+
+
+def event_type(event):
+    kind = event.get('Type')
+    if kind:
+        return kind
+    # pre-1.22 daemons only tag container events with their image
+    return 'container' if 'from' in event else 'image'
+
+
+class EventStream(object):
+    """
+    A single long-lived subscription to the daemon's event stream. The stream
+    is read on a dedicated daemon thread and every decoded event is handed
+    back to the reactor thread as a signal. Lost connections are retried with
+    exponential backoff.
+    """
+
+    def __init__(self, client_factory, retry=1, max_retry=30):
+        self.client_factory = client_factory
+        self.retry = retry
+        self.max_retry = max_retry
+        self.running = False
+        self.connected = False
+        self.client = None
+        self.connects = 0
+        self.received = 0
+        self.thread = None
+        urwid.register_signal(EventStream, [
+            'connected', 'disconnected', 'container-event', 'image-event',
+        ])
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(name='events', target=self.run)
+        self.thread.setDaemon(True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.client:
+            self.client.close()
+
+    def run(self):
+        delay = self.retry
+        while self.running:
+            try:
+                client = self.client = self.client_factory()
+                stream = client.events(decode=False)
+            except Exception:
+                time.sleep(delay)
+                delay = min(delay * 2, self.max_retry)
+                continue
+
+            delay = self.retry
+            reactor.callFromThread(self.on_connected)
+            decoder = EventDecoder()
+            try:
+                for chunk in stream:
+                    if not self.running:
+                        break
+                    for event in decoder.feed(chunk):
+                        reactor.callFromThread(self.dispatch, event)
+            except Exception:
+                pass
+            finally:
+                client.close()
+            reactor.callFromThread(self.on_disconnected)
+            if self.running:
+                time.sleep(delay)
+
+    def on_connected(self):
+        self.connected = True
+        self.connects += 1
+        urwid.emit_signal(self, 'connected', self.connects > 1)
+
+    def on_disconnected(self):
+        self.connected = False
+        urwid.emit_signal(self, 'disconnected')
+
+    def dispatch(self, event):
+        self.received += 1
+        kind = event_type(event)
+        if kind not in ('container', 'image'):
+            return
+        signal = '%s-event' % kind
+        urwid.emit_signal(self, signal, event_action(event), event_id(event), event)
@@ -0,0 +1,125 @@
+from collections import deque
+
+from twisted.internet import defer, reactor, threads
+from twisted.python.failure import Failure
+from twisted.python.threadpool import ThreadPool
+
+
+class Lane(object):
+    """
+    A bounded queue of blocking calls served by its own thread pool. At most
+    `limit` calls run at once; the rest wait in FIFO order. Cancelling the
+    Deferred of a queued call drops it from the queue, cancelling a running
+    one discards its result when it completes.
+    """
+
+    def __init__(self, name, limit):
+        self.name = name
+        self.limit = limit
+        self.queue = deque()
+        self.running = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.max_depth = 0
+        self.pool = ThreadPool(minthreads=0, maxthreads=limit, name='lane-%s' % name)
+
+    def stats(self):
+        return {
+            'limit': self.limit,
+            'queued': len(self.queue),
+            'running': self.running,
+            'max_depth': self.max_depth,
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'failed': self.failed,
+            'cancelled': self.cancelled,
+        }
+
+    def submit(self, fn, *args, **kwargs):
+        d = defer.Deferred(self.cancel)
+        self.queue.append((d, fn, args, kwargs))
+        self.submitted += 1
+        self.max_depth = max(self.max_depth, len(self.queue))
+        self.dispatch()
+        return d
+
+    def cancel(self, d):
+        self.cancelled += 1
+        for job in self.queue:
+            if job[0] is d:
+                self.queue.remove(job)
+                break
+
+    def dispatch(self):
+        if not self.pool.started:
+            self.pool.start()
+        while self.queue and self.running < self.limit:
+            d, fn, args, kwargs = self.queue.popleft()
+            self.running += 1
+            job = threads.deferToThreadPool(reactor, self.pool, fn, *args, **kwargs)
+            job.addBoth(self.finished, d)
+
+    def finished(self, result, d):
+        self.running -= 1
+        if isinstance(result, Failure):
+            self.failed += 1
+        else:
+            self.completed += 1
+        if not d.called:
+            if isinstance(result, Failure):
+                d.errback(result)
+            else:
+                d.callback(result)
+        self.dispatch()
+
+    def stop(self):
+        for d, fn, args, kwargs in list(self.queue):
+            d.cancel()
+        if self.pool.started:
+            self.pool.stop()
+
+
+class Executor(object):
+    """
+    Runs every blocking Docker API call on one of a few independent lanes so
+    that long or numerous calls of one kind can't starve the others:
+
+        interactive - calls the user is waiting on, such as inspect or top
+               poll - background refreshes of the monitors
+               bulk - state changes, possibly over many marked rows
+             stream - long running transfers such as push and pull
+            process - preparing snapshots for display, one at a time so that
+                      results come back in order
+           prefetch - speculative calls for details the user may look at next
+             dialog - preparing large results for display in dialogs, such
+                      as grouping a diff or indexing a document for search
+    """
+
+    limits = {
+        'interactive': 4,
+        'poll': 2,
+        'bulk': 4,
+        'stream': 2,
+        'process': 1,
+        'prefetch': 2,
+        'dialog': 1,
+    }
+
+    def __init__(self, limits=None):
+        limits = dict(self.limits, **(limits or {}))
+        self.lanes = dict(
+            (name, Lane(name, limit)) for name, limit in limits.items()
+        )
+        reactor.addSystemEventTrigger('during', 'shutdown', self.stop)
+
+    def submit(self, lane, fn, *args, **kwargs):
+        return self.lanes[lane].submit(fn, *args, **kwargs)
+
+    def stats(self):
+        return dict((name, lane.stats()) for name, lane in self.lanes.items())
+
+    def stop(self):
+        for lane in self.lanes.values():
+            lane.stop()
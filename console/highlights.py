@@ -1,27 +1,84 @@
+import math
+import time
+
+from twisted.internet import reactor
+
 from .app import app
 
 class Highlighter(object):
-    def __init__(self, default_attr='highlight', default_focus='highlight_focus'):
+    """
+    Tracks temporary row highlights by table and record key rather than by
+    widget, so they survive rows being rebuilt; tables ask for a key's style
+    whenever they build or restyle a row. Highlights given a duration are
+    expired by a timer wheel: expirations are bucketed into ticks of
+    `resolution` seconds and a single timer serves the earliest bucket,
+    clearing everything due in one pass and one redraw.
+    """
+
+    def __init__(self, default_attr='highlight', default_focus='highlight_focus', resolution=0.25):
         self.highlights = {}
+        self.wheel = {}
         self.default_attr = default_attr
         self.default_focus = default_focus
+        self.resolution = resolution
+        self.timer = None
 
-    def apply(self, row, attr_style=None, focus_style=None):
+    def style(self, table, key):
+        entry = self.highlights.get((table, key))
+        if entry:
+            return entry[:2]
+
+    def apply(self, table, key, attr_style=None, focus_style=None, duration=None):
         attr_style = attr_style or self.default_attr
         focus_style = focus_style or self.default_focus
 
-        self.highlights[row] = [row, (row._attr_map, row._focus_map), (attr_style, focus_style)]
+        self.unschedule(table, key)
+        tick = None
+        if duration is not None:
+            tick = int(math.ceil((time.time() + duration) / self.resolution))
+            self.wheel.setdefault(tick, set()).add((table, key))
+            self.schedule()
+        self.highlights[(table, key)] = (attr_style, focus_style, tick)
+        table.restyle(key)
+        app.redraw()
+
+    def remove(self, table, key):
+        if (table, key) in self.highlights:
+            self.unschedule(table, key)
+            del self.highlights[(table, key)]
+            table.restyle(key)
+            app.redraw()
+
+    def unschedule(self, table, key):
+        entry = self.highlights.get((table, key))
+        if entry and entry[2] is not None:
+            bucket = self.wheel[entry[2]]
+            bucket.discard((table, key))
+            if not bucket:
+                del self.wheel[entry[2]]
 
-        row.set_attr_map({None: attr_style})
-        row.set_focus_map({None: focus_style or attr_style})
-        app.draw_screen()
+    def schedule(self):
+        if not self.wheel:
+            return
+        delay = max(0, min(self.wheel) * self.resolution - time.time())
+        if self.timer and self.timer.active():
+            if self.timer.getTime() > time.time() + delay:
+                self.timer.reset(delay)
+        else:
+            self.timer = reactor.callLater(delay, self.tick)
 
-    def remove(self, row):
-        if row in self.highlights:
-            row, original_style, applied_style = self.highlights.pop(row)
-            attr_map, focus_map = original_style
-            row.set_attr_map(attr_map)
-            row.set_focus_map(focus_map)
-            app.draw_screen()
+    def tick(self):
+        self.timer = None
+        # a little slack so float rounding can't hold a due bucket back a tick
+        now = int(time.time() / self.resolution + 0.01)
+        expired = False
+        for tick in sorted(t for t in self.wheel if t <= now):
+            for table, key in self.wheel.pop(tick):
+                del self.highlights[(table, key)]
+                table.restyle(key)
+                expired = True
+        if expired:
+            app.redraw()
+        self.schedule()
 
 highlighter = Highlighter()
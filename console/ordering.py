@@ -0,0 +1,149 @@
+"""
+User selectable listing orders, kept up to date incrementally.
+
+An order is a list of (column, descending) pairs from the most significant,
+naming columns of a monitor's ColumnStore. It is typed as the column names
+separated by spaces or commas, each prefixed with `-` to sort descending:
+
+    image -age
+"""
+import re
+from bisect import bisect_left, bisect_right
+
+
+class OrderError(ValueError):
+    pass
+
+
+class ListingError(LookupError):
+    """
+    A listing was updated with a removed record it doesn't list, meaning it
+    no longer matches the snapshot it was sorted from.
+    """
+
+
+def parse_order(text, columns):
+    """
+    Parse `text` into an order over the named `columns`. Raises OrderError
+    for unknown columns.
+    """
+    order = []
+    for term in re.split(r'[\s,]+', text.strip()):
+        if not term:
+            continue
+        descending = term.startswith('-')
+        name = term.lstrip('+-').lower()
+        if name not in columns:
+            raise OrderError("can't sort by %s, only by %s" % (name, ", ".join(sorted(columns))))
+        order.append((name, descending))
+    return tuple(order)
+
+
+def format_order(order):
+    return " ".join(('-' if descending else '') + name for name, descending in order)
+
+
+class Descending(object):
+    """
+    Wraps a value in a sort key to reverse its order.
+    """
+
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+    def __ne__(self, other):
+        return self.value != other.value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+    def __le__(self, other):
+        return other.value <= self.value
+
+    def __gt__(self, other):
+        return other.value > self.value
+
+    def __ge__(self, other):
+        return other.value >= self.value
+
+
+class SortedListing(object):
+    """
+    Records in `order` along with their sort keys, over the fields of the
+    ColumnStore `template`. A listing is sorted from scratch with the
+    store by `reorder`, and afterwards only changed records are moved, by
+    bisecting the sort keys.
+
+    Both return a new listing and leave this one as it is, so that they can
+    run off the reactor thread.
+    """
+
+    def __init__(self, template, order=()):
+        self.template = template
+        self.order = tuple(order)
+        self.records = []
+        self.keys = []
+        self.store = None
+        fields = dict(template.numbers)
+        fields.update(template.categories)
+        self.fields = [(fields[name], descending) for name, descending in self.order]
+
+    def __len__(self):
+        return len(self.records)
+
+    def sort_key(self, record):
+        return tuple(
+            Descending(field(record)) if descending else field(record)
+            for field, descending in self.fields
+        )
+
+    def columns(self):
+        """
+        Return a ColumnStore of the listed records, for aggregates.
+        """
+        if self.store is None:
+            self.store = self.template.rebuild(self.records)
+        return self.store
+
+    def reorder(self, records, order=None):
+        """
+        Return a listing of `records` sorted by `order`, or this listing's.
+        """
+        listing = SortedListing(self.template, self.order if order is None else order)
+        listing.store = self.template.rebuild(records)
+        listing.records = listing.store.take(listing.store.order(listing.order))
+        listing.keys = [listing.sort_key(record) for record in listing.records]
+        return listing
+
+    def update(self, removed, added):
+        """
+        Return a listing without the `removed` records, and with the
+        `added` ones in their place. Raises ListingError if one of the
+        removed records isn't listed.
+        """
+        listing = SortedListing(self.template, self.order)
+        listing.records = list(self.records)
+        listing.keys = list(self.keys)
+        key = self.template.key
+        for record in removed:
+            sort_key = listing.sort_key(record)
+            start = bisect_left(listing.keys, sort_key)
+            end = bisect_right(listing.keys, sort_key, start)
+            for position in xrange(start, end):
+                if key(listing.records[position]) == key(record):
+                    del listing.keys[position]
+                    del listing.records[position]
+                    break
+            else:
+                raise ListingError("%r isn't listed" % (key(record),))
+        for record in added:
+            sort_key = listing.sort_key(record)
+            position = bisect_right(listing.keys, sort_key)
+            listing.keys.insert(position, sort_key)
+            listing.records.insert(position, record)
+        return listing
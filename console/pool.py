@@ -0,0 +1,145 @@
+import threading
+import time
+
+import requests
+
+
+class ClientPool(object):
+    """
+    A bounded pool of docker clients, each keeping its own persistent
+    keep-alive connection to the daemon. A worker thread checks a client out
+    for the duration of a single call so connections are never shared
+    between threads. Clients that sat idle for longer than `idle` seconds
+    are pinged before being handed out and replaced if the ping fails.
+
+    A thread waiting for a client is woken when one is released, or when one
+    is discarded and so leaves room to create another.
+    """
+
+    def __init__(self, factory, size=8, idle=30):
+        self.factory = factory
+        self.size = size
+        self.idle = idle
+        # hand out the most recently used, and so warmest, connection first
+        self.free = []
+        self.ready = threading.Condition()
+        self.clients = set()
+        self.creating = 0
+        self.closed = False
+        self.calls = 0
+        self.waits = 0
+        self.replaced = 0
+
+    def stats(self):
+        return {
+            'size': self.size,
+            'open': len(self.clients),
+            'idle': len(self.free),
+            'calls': self.calls,
+            'waits': self.waits,
+            'replaced': self.replaced,
+        }
+
+    def create(self):
+        """
+        Create a client in a slot reserved by counting it in `creating`.
+        """
+        try:
+            client = self.factory()
+        except Exception:
+            with self.ready:
+                self.creating -= 1
+                self.ready.notify()
+            raise
+        with self.ready:
+            self.creating -= 1
+            self.clients.add(client)
+        return client
+
+    def discard(self, client):
+        with self.ready:
+            self.clients.discard(client)
+            self.ready.notify()
+        client.close()
+
+    def healthy(self, client):
+        try:
+            client.ping()
+        except Exception:
+            return False
+        return True
+
+    def acquire(self):
+        with self.ready:
+            if not self.free and len(self.clients) + self.creating >= self.size:
+                self.waits += 1
+                while not self.free and len(self.clients) + self.creating >= self.size:
+                    self.ready.wait()
+            if self.free:
+                client, released = self.free.pop()
+            else:
+                self.creating += 1
+                client = None
+        if client is None:
+            return self.create()
+        if time.time() - released > self.idle and not self.healthy(client):
+            # its slot goes straight to the replacement
+            self.replaced += 1
+            with self.ready:
+                self.clients.discard(client)
+                self.creating += 1
+            client.close()
+            return self.create()
+        return client
+
+    def release(self, client):
+        if self.closed:
+            self.discard(client)
+        else:
+            with self.ready:
+                self.free.append((client, time.time()))
+                self.ready.notify()
+
+    def call(self, name, *args, **kwargs):
+        if self.closed:
+            raise RuntimeError("The client pool has been closed.")
+        self.calls += 1
+        client = self.acquire()
+        try:
+            result = getattr(client, name)(*args, **kwargs)
+        except requests.exceptions.ConnectionError:
+            self.discard(client)
+            raise
+        except Exception:
+            self.release(client)
+            raise
+        self.release(client)
+        return result
+
+    def close(self):
+        self.closed = True
+        with self.ready:
+            clients, self.clients = self.clients, set()
+            self.free = []
+            self.ready.notify_all()
+        for client in clients:
+            client.close()
+
+
+class PooledClient(object):
+    """
+    Stands in for a docker.Client: every method call is made on a client
+    checked out of `pool`.
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            return self.pool.call(name, *args, **kwargs)
+        call.__name__ = name
+        return call
+
+    def close(self):
+        self.pool.close()
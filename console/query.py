@@ -0,0 +1,251 @@
+r"""
+The filter bar's query language. A query is a whitespace separated list of
+terms which must all hold:
+
+    word              substring of any of the record's searchable strings
+    field:value       field specific match, see the field types below
+    field=value       exact match
+    field!=value      anything but an exact match
+    field>n, field<=n, ...
+                      numeric comparison
+    -term             negation of any field term
+
+Values may be quoted to include spaces and, for text fields, may be globs
+(`nginx*`) or regular expressions (`/api-\d+/`). Terms naming a field the
+pane doesn't know are taken as plain words, so `nginx:latest` still
+searches for that image.
+
+A query is parsed once into a tree of predicates, evaluated against the
+columns an index precomputed for every record.
+"""
+import fnmatch
+import operator
+import re
+
+
+class QueryError(ValueError):
+    pass
+
+
+TOKEN = re.compile(r'(?:"[^"]*"|\S)+')
+TERM = re.compile(r'^(-?)(\w+)(:|!=|>=|<=|=|>|<)(.+)$')
+
+COMPARISONS = {
+    ':': operator.eq,
+    '=': operator.eq,
+    '!=': operator.ne,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+}
+
+
+def unquote(value):
+    return value.replace('"', '')
+
+
+def compile_pattern(value):
+    """
+    Return a test for /regex/ and glob values, or None for plain ones.
+    Values are taken as typed: regular expressions ignore case instead of
+    being lowercased, which would turn escapes like \\D into \\d.
+    """
+    if len(value) > 1 and value.startswith('/') and value.endswith('/'):
+        try:
+            return re.compile(value[1:-1], re.IGNORECASE).search
+        except re.error, e:
+            raise QueryError("has a bad pattern %s: %s" % (value, e))
+    if any(c in value for c in '*?['):
+        return re.compile(fnmatch.translate(value.lower())).match
+    return None
+
+
+class Words(object):
+    def __init__(self, words):
+        self.words = words
+
+    def __call__(self, haystack, columns):
+        return all(word in haystack for word in self.words)
+
+
+class Match(object):
+    """
+    Holds if `test` holds for any of the values of a column. A `lookup` of
+    (column, value) means the matching records can be found in that
+    column's index instead.
+    """
+
+    def __init__(self, column, test, lookup=None):
+        self.column = column
+        self.test = test
+        self.lookup = lookup
+
+    def __call__(self, haystack, columns):
+        values = columns[self.column]
+        if not isinstance(values, (list, tuple)):
+            return self.test(values)
+        return any(self.test(value) for value in values)
+
+
+class Not(object):
+    lookup = None
+
+    def __init__(self, predicate):
+        self.predicate = predicate
+
+    def __call__(self, haystack, columns):
+        return not self.predicate(haystack, columns)
+
+
+class All(object):
+    def __init__(self, predicates):
+        self.predicates = predicates
+
+    def __call__(self, haystack, columns):
+        for predicate in self.predicates:
+            if not predicate(haystack, columns):
+                return False
+        return True
+
+
+class TextField(object):
+    """
+    Lowercased strings, or lists of them, matched by substring, glob or
+    regular expression.
+    """
+
+    def __init__(self, column):
+        self.column = column
+
+    def compile(self, op, value):
+        if op not in (':', '=', '!='):
+            raise QueryError("can't be compared with %s" % op)
+        test = compile_pattern(value)
+        value = value.lower()
+        if test is None and op == ':':
+            test = lambda v: value in v
+        elif test is None:
+            test = lambda v: v == value
+        if op == '!=':
+            return Not(Match(self.column, test))
+        return Match(self.column, test)
+
+
+class KeywordField(object):
+    """
+    A small set of exact values per record, such as a state or an image and
+    its repository, which the index keeps a lookup table for. Values outside
+    `keywords`, when given, are searched for in the `text` column instead.
+    Without `keywords` the set is open ended, and `field:value` matches by
+    substring like a text field while `field=value` uses the lookup table.
+    """
+
+    def __init__(self, column, keywords=None, text=None):
+        self.column = column
+        self.keywords = keywords
+        self.text = text
+
+    def compile(self, op, value):
+        if op not in (':', '=', '!='):
+            raise QueryError("can't be compared with %s" % op)
+        test = compile_pattern(value)
+        value = value.lower()
+        if test is not None:
+            predicate = Match(self.column, test)
+        elif self.keywords is None and op == ':':
+            predicate = Match(self.column, lambda v: value in v)
+        elif self.keywords is None or value in self.keywords:
+            predicate = Match(self.column, lambda v: v == value, (self.column, value))
+        elif self.text:
+            predicate = Match(self.text, lambda v: value in v)
+        else:
+            raise QueryError("must be one of %s" % ", ".join(self.keywords))
+        if op == '!=':
+            return Not(predicate)
+        return predicate
+
+
+class NumberField(object):
+    def __init__(self, column):
+        self.column = column
+
+    def compile(self, op, value):
+        try:
+            value = int(value)
+        except ValueError:
+            raise QueryError("must be compared with a number")
+        compare = COMPARISONS[op]
+        return Match(self.column, lambda v: compare(v, value))
+
+
+class LabelField(object):
+    """
+    `label:key` holds if the label is set, `label:key=value` if it has that
+    value, which may be a glob or regular expression.
+    """
+
+    def __init__(self, column):
+        self.column = column
+
+    def compile(self, op, value):
+        if op != ':':
+            raise QueryError("is matched with label:key or label:key=value")
+        key, sep, value = value.partition('=')
+        key = key.lower()
+        if not sep:
+            return Match(self.column, lambda labels: key in labels)
+        test = compile_pattern(value)
+        value = value.lower()
+        if test is None:
+            test = lambda v: v == value
+        return Match(self.column, lambda labels: key in labels and test(labels[key]))
+
+
+class Query(object):
+    """
+    A parsed query. `terms` lists the (field, op, value) of its positive
+    field terms with their values as typed, for translating into the
+    daemon's own filters.
+    """
+
+    def __init__(self, text, predicate, lookups, terms, plain):
+        self.text = text
+        self.predicate = predicate
+        self.lookups = lookups
+        self.terms = terms
+        self.plain = plain
+
+
+def parse_query(text, fields):
+    """
+    Parse `text` into a Query over the named `fields`. Raises QueryError
+    for malformed terms.
+    """
+    words = []
+    predicates = []
+    lookups = []
+    terms = []
+    for token in TOKEN.findall(text):
+        match = TERM.match(token)
+        if not match or match.group(2).lower() not in fields:
+            words.append(unquote(token).lower())
+            continue
+        negate, name, op, value = match.groups()
+        name = name.lower()
+        value = unquote(value)
+        try:
+            predicate = fields[name].compile(op, value)
+        except QueryError, e:
+            raise QueryError("%s %s" % (name, e))
+        if negate:
+            predicate = Not(predicate)
+        else:
+            terms.append((name, op, value))
+            if predicate.lookup:
+                lookups.append(predicate.lookup)
+        predicates.append(predicate)
+    plain = not predicates
+    if words:
+        predicates.insert(0, Words(words))
+    return Query(text.lower(), All(predicates), lookups, terms, plain)
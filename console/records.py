@@ -0,0 +1,106 @@
+"""
+Compact, immutable records for the monitors' snapshots. The same record
+objects are shared by the monitors, the search indexes and the tables, and
+a record is replaced rather than changed, so that holders can tell it
+changed by its identity alone.
+"""
+
+class StringTable(object):
+    """
+    Canonical copies of frequently repeated strings such as image names or
+    statuses, so that records share them. Unlike intern() this accepts
+    unicode too. Only the strings interned since the previous `rotate` are
+    kept on, so that a table rotated for every snapshot holds the strings
+    of the last two rather than of every one seen.
+    """
+
+    def __init__(self):
+        self.current = {}
+        self.previous = {}
+
+    def __len__(self):
+        return len(self.current)
+
+    def intern(self, value):
+        found = self.current.get(value)
+        if found is None:
+            found = self.current[value] = self.previous.get(value, value)
+        return found
+
+    def rotate(self):
+        self.previous, self.current = self.current, {}
+
+
+class Record(object):
+    """
+    A record with the fixed set of fields named by `__slots__`. Fields are
+    read as attributes, or by name like the dictionaries records used to
+    be.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            object.__setattr__(self, name, fields[name])
+
+    def __setattr__(self, name, value):
+        raise AttributeError("%s records are immutable" % type(self).__name__)
+
+    def __getitem__(self, name):
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            raise KeyError(name)
+
+    def values(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def items(self):
+        return [(name, getattr(self, name)) for name in self.__slots__]
+
+    def __eq__(self, other):
+        return type(other) is type(self) and other.values() == self.values()
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.values())
+
+    def __repr__(self):
+        return "%s(%s)" % (
+            type(self).__name__,
+            ", ".join("%s=%r" % item for item in self.items()),
+        )
+
+    def replace(self, **changes):
+        fields = dict(self.items())
+        fields.update(changes)
+        return type(self)(**fields)
+
+    def changes(self, previous):
+        """
+        Map the names of the fields that differ from `previous` to their
+        values in this record.
+        """
+        return dict(
+            (name, value) for name, value in self.items()
+            if getattr(previous, name) != value
+        )
+
+
+class Container(Record):
+    __slots__ = ('id', 'image', 'names', 'status', 'command', 'age', 'created', 'labels')
+
+
+class Image(Record):
+    __slots__ = ('id', 'tags', 'days_old')
+
+
+class ImageTag(Record):
+    """
+    One row of the image listing: an image under one of its tags.
+    """
+
+    __slots__ = ('id', 'tag', 'days_old')
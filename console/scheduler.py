@@ -0,0 +1,264 @@
+import gc
+import time
+
+from twisted.internet import reactor
+
+
+class Poller(object):
+    """
+    Drives the refreshes of a single resource. There is only ever one timer
+    and at most one fetch in flight: a refresh requested while a fetch is
+    running joins it, and refreshes closer together than `min_interval` are
+    folded into a single deferred fetch. While `periodic` is off, or the
+    poller is suspended, it only fetches when asked to.
+
+    The polling interval adapts: every fetch that brings no changes backs it
+    off exponentially up to `max_interval`, while observed changes and user
+    activity snap it back to the base interval.
+    """
+
+    def __init__(self, fetch, interval, min_interval=0.1, max_interval=None, backoff=2):
+        self.fetch = fetch
+        self.base_interval = interval
+        self.interval = interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval or max(interval, min(interval * 32, 30))
+        self.backoff = backoff
+        self.periodic = True
+        self.suspended = False
+        self.changes = 0
+        self.running = False
+        self.again = False
+        self.busy = False
+        self.timer = None
+        self.last = 0
+        self.requested = 0
+        self.coalesced = 0
+        self.fetches = 0
+        self.failures = 0
+
+    def stats(self):
+        return {
+            'requested': self.requested,
+            'coalesced': self.coalesced,
+            'fetches': self.fetches,
+            'failures': self.failures,
+            'busy': self.busy,
+            'periodic': self.periodic,
+            'suspended': self.suspended,
+            'interval': self.interval,
+        }
+
+    def start(self):
+        self.running = True
+        self.refresh()
+
+    def stop(self):
+        self.running = False
+        self.cancel()
+
+    def set_periodic(self, periodic):
+        self.periodic = periodic
+        if periodic:
+            self.schedule(self.interval)
+        else:
+            self.cancel()
+
+    def suspend(self):
+        self.suspended = True
+        self.cancel()
+
+    def resume(self):
+        self.suspended = False
+        self.interval = self.base_interval
+        self.refresh()
+
+    def changed(self):
+        self.changes += 1
+        self.interval = self.base_interval
+
+    def poke(self):
+        """
+        Note user activity: poll at the base rate again.
+        """
+        self.interval = self.base_interval
+        self.schedule(self.interval)
+
+    def refresh(self):
+        """
+        Ask for a fetch as soon as possible.
+        """
+        self.requested += 1
+        if self.busy:
+            self.coalesced += 1
+            return
+        wait = self.last + self.min_interval - time.time()
+        if wait > 0:
+            self.coalesced += 1
+            self.schedule(wait, forced=True)
+            return
+        self.run()
+
+    def invalidate(self):
+        """
+        Like refresh, but a fetch already in flight is considered stale and
+        another one follows as soon as it completes.
+        """
+        if self.busy:
+            self.again = True
+        self.refresh()
+
+    def run(self):
+        self.cancel()
+        self.busy = True
+        self.last = time.time()
+        self.fetches += 1
+        d = self.fetch()
+        d.addErrback(self.failed)
+        d.addBoth(self.finished)
+        return d
+
+    def failed(self, failure):
+        self.failures += 1
+
+    def finished(self, result):
+        self.busy = False
+        if not self.changes:
+            self.interval = min(self.interval * self.backoff, self.max_interval)
+        self.changes = 0
+        if self.again:
+            self.again = False
+            self.refresh()
+        elif self.periodic:
+            self.schedule(self.interval)
+
+    def schedule(self, delay, forced=False):
+        if self.busy:
+            return
+        if not forced and (not self.running or self.suspended or not self.periodic):
+            return
+        if self.timer and self.timer.active():
+            if self.timer.getTime() <= time.time() + delay:
+                return
+            self.timer.cancel()
+        self.timer = reactor.callLater(delay, self.run)
+
+    def cancel(self):
+        if self.timer and self.timer.active():
+            self.timer.cancel()
+        self.timer = None
+
+
+class FrameScheduler(object):
+    """
+    Coalesces redraw requests into frames. Callers only mark the screen as
+    dirty; it is rendered at most once per frame, no more than `fps` times a
+    second, however many requests came in since the last one.
+    """
+
+    def __init__(self, draw, fps=30):
+        self.draw = draw
+        self.frame = 1.0 / fps
+        self.timer = None
+        self.last = 0
+        self.requested = 0
+        self.performed = 0
+        reactor.addSystemEventTrigger('before', 'shutdown', self.stop)
+
+    def stats(self):
+        return {
+            'requested': self.requested,
+            'performed': self.performed,
+            'pending': self.timer is not None,
+        }
+
+    def request(self):
+        self.requested += 1
+        if self.timer:
+            return
+        wait = max(0, self.last + self.frame - time.time())
+        self.timer = reactor.callLater(wait, self.render)
+
+    def render(self):
+        self.timer = None
+        self.last = time.time()
+        self.performed += 1
+        self.draw()
+
+    def stop(self):
+        if self.timer and self.timer.active():
+            self.timer.cancel()
+        self.timer = None
+
+
+class Debouncer(object):
+    """
+    Calls `fn` once `delay` seconds have passed without another call to
+    `trigger`.
+    """
+
+    def __init__(self, fn, delay=0.15):
+        self.fn = fn
+        self.delay = delay
+        self.timer = None
+
+    def trigger(self):
+        if self.timer and self.timer.active():
+            self.timer.reset(self.delay)
+        else:
+            self.timer = reactor.callLater(self.delay, self.fire)
+
+    def fire(self):
+        self.timer = None
+        self.fn()
+
+    def cancel(self):
+        if self.timer and self.timer.active():
+            self.timer.cancel()
+        self.timer = None
+
+
+class IdleCollector(object):
+    """
+    A full garbage collection holds every thread for as long as it takes
+    to traverse all live objects, which with tens of thousands of records
+    is far longer than a frame. Once no frame has been drawn for `idle`
+    seconds, the oldest generation is collected as soon as it is half way
+    to its automatic collection, so that this one rarely lands mid-frame.
+    The collector's thresholds are left as they are, so a busy session is
+    still collected automatically.
+    """
+
+    def __init__(self, frames, idle=1, interval=5):
+        self.frames = frames
+        self.idle = idle
+        self.interval = interval
+        self.threshold = gc.get_threshold()
+        self.timer = None
+        self.collections = 0
+
+    def stats(self):
+        return {
+            'collections': self.collections,
+            'pending': gc.get_count()[2],
+        }
+
+    def start(self):
+        self.timer = reactor.callLater(self.interval, self.tick)
+        reactor.addSystemEventTrigger('before', 'shutdown', self.stop)
+
+    def tick(self):
+        quiet = time.time() - self.frames.last
+        if quiet < self.idle or self.frames.timer:
+            self.timer = reactor.callLater(self.idle, self.tick)
+            return
+        # ahead of the collector, which resets the count
+        if gc.get_count()[2] >= max(1, self.threshold[2] // 2):
+            gc.collect()
+            self.collections += 1
+        self.timer = reactor.callLater(self.interval, self.tick)
+
+    def stop(self):
+        if self.timer and self.timer.active():
+            self.timer.cancel()
+        self.timer = None
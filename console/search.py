@@ -0,0 +1,212 @@
+from bisect import bisect_left, bisect_right
+
+from console.query import KeywordField, Query, QueryError, parse_query
+
+
+class Results(object):
+    """
+    The outcome of searching an index for `text`: either the matching
+    `records` with the `positions` of their keys, or the query's `error`.
+    """
+
+    def __init__(self, index, text, query=None, records=None, positions=None, error=None):
+        self.index = index
+        self.text = text
+        self.query = query
+        self.records = records
+        self.positions = positions
+        self.error = error
+
+
+class SearchIndex(object):
+    """
+    Filters an ordered list of records with queries in the filter bar's
+    query language. For each record the lowercased searchable `fields` are
+    joined into a single haystack and the `columns` used by field terms are
+    computed once, and reused for as long as the record object itself is
+    unchanged. Keyword columns of the `schema` get a lookup table so that
+    terms like `status:running` go straight to their records.
+
+    A plain query that contains the previous one only re-checks the
+    previous matches.
+
+    A new snapshot is indexed with `rebuild`, which leaves this index as it
+    is and returns a new one, so that it can run off the reactor thread.
+    """
+
+    def __init__(self, key, fields, columns=None, schema=None):
+        self.key = key
+        self.fields = fields
+        self.columns = columns or (lambda record: {})
+        self.schema = schema or {}
+        self.cache = {}
+        self.entries = []
+        self.lookup = {}
+        self.matches = []
+        self.query = u''
+        self.scanned = 0
+
+    def rebuild(self, records):
+        """
+        Return a new index over `records`, reusing this index's entries for
+        the records that are unchanged.
+        """
+        index = SearchIndex(self.key, self.fields, self.columns, self.schema)
+        cache = self.cache
+        for record in records:
+            key = self.key(record)
+            entry = cache.get(key)
+            if not entry or entry[0] is not record:
+                haystack = u'\0'.join(self.fields(record)).lower()
+                entry = (record, haystack, self.columns(record))
+            index.cache[key] = entry
+            index.entries.append(entry)
+
+        for field in self.schema.values():
+            if isinstance(field, KeywordField):
+                table = index.lookup[field.column] = {}
+                for position, entry in enumerate(index.entries):
+                    for keyword in entry[2][field.column]:
+                        table.setdefault(keyword, []).append(position)
+
+        index.matches = index.entries
+        return index
+
+    def candidates(self, query):
+        if query.plain and self.query is not None and self.query in query.text:
+            return self.matches
+        if not query.lookups:
+            return self.entries
+        positions = None
+        for column, value in query.lookups:
+            found = self.lookup[column].get(value, ())
+            positions = set(found) if positions is None else positions.intersection(found)
+        return [self.entries[position] for position in sorted(positions)]
+
+    def parse(self, text):
+        """
+        Parse `text` against this index's schema. Raises QueryError if the
+        query is malformed.
+        """
+        return parse_query(text, self.schema)
+
+    def search(self, query):
+        """
+        Return the records matching `query`, text or parsed, in order.
+        """
+        if not isinstance(query, Query):
+            query = self.parse(query)
+        candidates = self.candidates(query)
+        self.scanned += len(candidates)
+        predicate = query.predicate
+        self.matches = [entry for entry in candidates if predicate(entry[1], entry[2])]
+        self.query = query.text if query.plain else None
+        return [entry[0] for entry in self.matches]
+
+    def results(self, text):
+        """
+        Search for `text` and collect everything needed to display the
+        outcome, so that it can be done off the reactor thread.
+        """
+        try:
+            query = self.parse(text)
+        except QueryError, e:
+            return Results(self, text, error=e)
+        records = self.search(query)
+        positions = dict(
+            (self.key(record), position)
+            for position, record in enumerate(records)
+        )
+        return Results(self, text, query, records, positions)
+
+
+class DocumentIndex(object):
+    """
+    A flattened index of a nested `document`, such as the result of an
+    inspect call, with one entry per path in the order `children` walks
+    them. `children(path, value)` returns the (key, value) pairs under a
+    dict or a list.
+
+    Each entry is searched as a single line of its path, its keys joined
+    by `separator`, and its value, all the lines joined into one haystack.
+    A query starting with `^` only matches the start of paths, found by
+    bisecting them in sorted order. A query that contains the previous one
+    only re-checks the previous matches.
+
+    The index is built once per document and can be built off the reactor
+    thread.
+    """
+
+    def __init__(self, document, children, separator=u'.'):
+        self.paths = []
+        self.values = []
+        self.positions = {}
+        self.lines = []
+        stack = [((), document)]
+        while stack:
+            path, value = stack.pop()
+            branch = isinstance(value, (dict, list, tuple))
+            if path:
+                self.positions[path] = len(self.paths)
+                self.paths.append(path)
+                self.values.append(value)
+                dotted = separator.join(unicode(key) for key in path)
+                if not branch:
+                    dotted = u'%s: %s' % (dotted, unicode(value).replace(u'\n', u' '))
+                self.lines.append(dotted.lower())
+            if branch:
+                stack.extend(reversed([
+                    (path + (key,), child) for key, child in children(path, value)
+                ]))
+        self.haystack = u'\n'.join(self.lines)
+        self.starts = []
+        start = 0
+        for line in self.lines:
+            self.starts.append(start)
+            start += len(line) + 1
+        self.sorted = sorted(
+            (separator.join(unicode(key) for key in path).lower(), position)
+            for position, path in enumerate(self.paths)
+        )
+        self.query = u''
+        self.matches = []
+
+    def __len__(self):
+        return len(self.paths)
+
+    def containing(self, query):
+        matches = []
+        find = self.haystack.find
+        starts = self.starts
+        found = find(query)
+        while found != -1:
+            position = bisect_right(starts, found) - 1
+            matches.append(position)
+            if position + 1 == len(starts):
+                break
+            found = find(query, starts[position + 1])
+        return matches
+
+    def prefixed(self, prefix):
+        matches = []
+        for dotted, position in self.sorted[bisect_left(self.sorted, (prefix,)):]:
+            if not dotted.startswith(prefix):
+                break
+            matches.append(position)
+        return sorted(matches)
+
+    def search(self, text):
+        """
+        Return the positions of the entries matching `text`, in order.
+        """
+        query = text.strip().lower()
+        if not query or query == u'^':
+            matches = []
+        elif query.startswith(u'^'):
+            matches = self.prefixed(query[1:])
+        elif self.query and not self.query.startswith(u'^') and self.query in query:
+            matches = [position for position in self.matches if query in self.lines[position]]
+        else:
+            matches = self.containing(query)
+        self.query, self.matches = query, matches
+        return matches
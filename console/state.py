@@ -2,95 +2,860 @@ from datetime import datetime
 
 import docker
 import urwid
+import calendar
+import re
 import sys
+import threading
 import time
 
-from twisted.internet import reactor, threads
+from docker.constants import DEFAULT_DOCKER_API_VERSION
+from docker.utils import version_gte, version_lt
+
+from twisted.internet import reactor
+from twisted.python import log
+
+from console.cache import ResultCache
+from console.columns import ColumnStore
+from console.events import EventStream
+from console.executor import Executor
+from console.ordering import ListingError, SortedListing
+from console.pool import ClientPool, PooledClient
+from console.records import Container, Image, ImageTag, StringTable
+from console.scheduler import Poller
+
+
+# container events after which the listed state of a container may differ
+CONTAINER_ACTIONS = (
+    'create', 'start', 'restart', 'die', 'kill', 'stop', 'pause', 'unpause',
+    'rename', 'oom', 'update',
+)
+
+CONTAINER_STATES = ('running', 'paused', 'restarting', 'created', 'exited', 'dead')
+
+# the oldest API version spoken, and the first versions with each filter
+MIN_API_VERSION = '1.18'
+FILTER_VERSIONS = {
+    'status': '1.18',
+    'label': '1.18',
+    'ancestor': '1.22',
+    'name': '1.24',
+}
+STATUS_VERSIONS = {
+    'created': '1.20',
+    'dead': '1.22',
+}
+PLAIN_NAME = re.compile(r'^[\w.-]+$')
+
+# read-only calls whose results are cached, with the seconds they stay fresh
+# unless an event invalidates them first. Filesystem changes and processes
+# don't cause events, and image history never changes.
+CONTAINER_CALLS = {
+    'inspect_container': 30,
+    'diff': 5,
+    'top': 2,
+}
+IMAGE_CALLS = {
+    'inspect_image': 300,
+    'history': None,
+}
+
+
+def parse_timestamp(value):
+    if not value or value.startswith('0001-'):
+        return 0
+    value = value.split('.')[0].rstrip('Z')
+    return calendar.timegm(time.strptime(value, '%Y-%m-%dT%H:%M:%S'))
+
+
+def human_duration(seconds):
+    """
+    Mirror of the daemon's HumanDuration so that synthesized statuses match
+    the ones returned by the container list.
+    """
+    seconds = int(seconds)
+    minutes = seconds // 60
+    hours = minutes // 60
+    if seconds < 1:
+        return "Less than a second"
+    if seconds == 1:
+        return "1 second"
+    if seconds < 60:
+        return "%d seconds" % seconds
+    if minutes == 1:
+        return "About a minute"
+    if minutes < 60:
+        return "%d minutes" % minutes
+    if hours == 1:
+        return "About an hour"
+    if hours < 48:
+        return "%d hours" % hours
+    if hours < 24 * 7 * 2:
+        return "%d days" % (hours // 24)
+    if hours < 24 * 30 * 2:
+        return "%d weeks" % (hours // 24 // 7)
+    if hours < 24 * 365 * 2:
+        return "%d months" % (hours // 24 // 30)
+    return "%d years" % (hours // 24 // 365)
+
+
+def container_status(state):
+    now = time.time()
+    if state.get('Running'):
+        if state.get('Restarting'):
+            since = now - parse_timestamp(state.get('FinishedAt'))
+            return "Restarting (%d) %s ago" % (state.get('ExitCode', 0), human_duration(since))
+        uptime = human_duration(now - parse_timestamp(state.get('StartedAt')))
+        if state.get('Paused'):
+            return "Up %s (Paused)" % uptime
+        return "Up %s" % uptime
+    finished = parse_timestamp(state.get('FinishedAt'))
+    if not finished:
+        return "Created"
+    return "Exited (%d) %s ago" % (state.get('ExitCode', 0), human_duration(now - finished))
+
+
+def status_state(status):
+    """
+    Reduce a container's status line to one of CONTAINER_STATES.
+    """
+    if status.startswith('Up'):
+        return 'paused' if '(Paused)' in status else 'running'
+    for state in CONTAINER_STATES:
+        if status.lower().startswith(state):
+            return state
+    return status.split(' ')[0].lower()
+
+
+def caseless(value):
+    """
+    Whether `value` has no cased characters, so that matching it regardless
+    of case is the same as matching it exactly.
+    """
+    return value.lower() == value.upper()
+
+
+def daemon_filters(terms, version):
+    """
+    Translate the positive terms of a container query into filters for the
+    container list endpoint. Only terms whose daemon side match is at least
+    as broad as the local one are pushed down, so the filters may only
+    shrink the list to a superset of what the query shows. Local matches
+    ignore case, so values the daemon matches exactly are only pushed if
+    they are caseless.
+    """
+    def supported(name):
+        return version_gte(version, FILTER_VERSIONS[name])
+
+    filters = {}
+    for field, op, value in terms:
+        if op not in (':', '='):
+            continue
+        globbed = any(c in value for c in '*?[') or value.startswith('/')
+        if field == 'status':
+            state = value.lower()
+            if state in CONTAINER_STATES and version_gte(version, STATUS_VERSIONS.get(state, MIN_API_VERSION)):
+                filters.setdefault('status', []).append(state)
+        elif field == 'label' and not globbed and caseless(value) and supported('label'):
+            filters.setdefault('label', []).append(value)
+        elif field == 'image' and op == '=' and not globbed and supported('ancestor'):
+            # the local term matches a bare repository against any tag, and
+            # image:value any image containing it. Repositories are always
+            # lowercase, tags needn't be
+            repository, sep, tag = value.rpartition(':')
+            if sep and '/' not in tag and repository == repository.lower() and caseless(tag):
+                filters.setdefault('ancestor', []).append(value)
+        elif field == 'name' and PLAIN_NAME.match(value) and supported('name'):
+            # names match by substring and regardless of case locally
+            filters.setdefault('name', []).append('(?i)' + re.escape(value))
+    return filters
+
+
+def container_from_inspect(data):
+    """
+    Translate an inspect_container result into the shape returned by the
+    container list endpoint.
+    """
+    return {
+        'Id': data['Id'],
+        'Image': data['Config']['Image'],
+        'Names': ['/' + data['Name'].lstrip('/')],
+        'Command': " ".join([data['Path']] + (data.get('Args') or [])),
+        'Created': parse_timestamp(data['Created']),
+        'Status': container_status(data['State']),
+        'Labels': data['Config'].get('Labels'),
+    }
+
+
+class Delta(object):
+    """
+    The difference between two snapshots keyed by Id. `added` and `removed`
+    map ids to whole records while `changed` maps ids to just the fields
+    whose values differ. A `rescoped` delta follows a change of which
+    records are listed, such as new filters, rather than changes of the
+    records themselves.
+    """
+
+    def __init__(self, added=None, removed=None, changed=None, rescoped=False):
+        self.added = added or {}
+        self.removed = removed or {}
+        self.changed = changed or {}
+        self.rescoped = rescoped
+
+    def __nonzero__(self):
+        return bool(self.added or self.removed or self.changed)
+    __bool__ = __nonzero__
+
+
+def diff_records(old, new):
+    delta = Delta()
+    for id, record in new.items():
+        previous = old.get(id)
+        if previous is None:
+            delta.added[id] = record
+        elif previous != record:
+            delta.changed[id] = record.changes(previous)
+    for id, record in old.items():
+        if id not in new:
+            delta.removed[id] = record
+    return delta
+
+
+def apply_delta(snapshot, delta):
+    for id in delta.removed:
+        snapshot.pop(id, None)
+    snapshot.update(delta.added)
+    for id, fields in delta.changed.items():
+        snapshot[id] = snapshot[id].replace(**fields)
+    return snapshot
+
 
 class ContainerMonitor(object):
-    def __init__(self, client, frequency=1, all=False):
+    signal = 'container-list'
+    # the listing's order as (column, descending) from the most significant,
+    # which running containers always precede
+    sort_order = (('age', False), ('image', False), ('status', False))
+    sort_columns = ('id', 'names', 'image', 'command', 'status', 'state', 'age', 'created')
+
+    def __init__(self, client, executor, frequency=1, all=False, limit=0):
         self.client = client
+        self.executor = executor
         self.frequency = frequency
-        self.all = False
-        urwid.register_signal(ContainerMonitor, 'container-list')
-        self.get_count = 1
-        self.end_get = 0
+        self.limit = limit
+        self._all = False
+        self._filters = {}
+        self.live = False
+        self.version = 0
+        self.snapshot = {}
+        self.strings = StringTable()
+        # the (all, filters) the snapshot was listed with
+        self.scope = None
+        self.store = ColumnStore(
+            lambda container: container.id,
+            {
+                'exited': lambda container: 'Exited' in container.status,
+                'age': lambda container: container.age,
+                'created': lambda container: container.created,
+            },
+            {
+                'id': lambda container: container.id,
+                'names': lambda container: ",".join(container.names),
+                'image': lambda container: container.image,
+                'command': lambda container: container.command,
+                'status': lambda container: container.status,
+                'state': lambda container: status_state(container.status),
+            },
+        )
+        self.listing = SortedListing(self.store, self.order)
+        self.poller = Poller(self.fetch_containers, frequency)
+        urwid.register_signal(ContainerMonitor, self.signal)
+
+    @property
+    def order(self):
+        return (('exited', False),) + self.sort_order
+
+    @property
+    def containers(self):
+        return self.listing.records
+
+    @property
+    def all(self):
+        return self._all
+
+    @all.setter
+    def all(self, all):
+        if all != self._all:
+            self._all = all
+            self.poller.invalidate()
+
+    @property
+    def filters(self):
+        return self._filters
+
+    @filters.setter
+    def filters(self, filters):
+        if filters != self._filters:
+            self._filters = filters
+            self.poller.invalidate()
+
+    def watch(self, events):
+        urwid.connect_signal(events, 'connected', self.on_connected)
+        urwid.connect_signal(events, 'disconnected', self.on_disconnected)
+        urwid.connect_signal(events, 'container-event', self.on_event)
+
+    def on_connected(self, reconnect):
+        # while the event stream is up, events drive updates instead of polls
+        self.live = True
+        self.poller.set_periodic(False)
+        if reconnect:
+            self.poller.refresh()
+
+    def on_disconnected(self):
+        self.live = False
+        self.poller.set_periodic(True)
+        self.poller.refresh()
+
+    def on_event(self, action, id, event):
+        if action == 'destroy':
+            self.replace_container(id, None)
+        elif action in CONTAINER_ACTIONS:
+            d = self.executor.submit('poll', self.client.inspect_container, id)
+            d.addCallback(self.update_container)
+            d.addErrback(lambda failure: None)
+
+    def update_container(self, data):
+        container = None
+        if self.all or data['State'].get('Running'):
+            container = self.process_container(container_from_inspect(data), datetime.now())
+        return self.replace_container(data['Id'], container)
+
+    def replace_container(self, id, container):
+        old = {id: self.snapshot[id]} if id in self.snapshot else {}
+        new = {id: container} if container is not None else {}
+        return self.commit(diff_records(old, new))
+
+    def process_container(self, container, now):
+        created = datetime.fromtimestamp(container['Created'])
+        status = container['Status']
+        # keep the seconds counter of fresh containers from changing every poll
+        if status.startswith('Up') and 'second' in status:
+            status = "Up 0 minutes"
+        labels = container.get('Labels') or {}
+        intern = self.strings.intern
+        # ids and names are plain ASCII, stored narrow they take a quarter
+        # of the space of the decoded unicode
+        return Container(
+            id=str(container['Id']),
+            image=intern(container['Image']),
+            names=tuple(str(name) for name in container['Names']),
+            status=intern(status),
+            command=intern(container['Command']),
+            age=(now - created).days,
+            created=container['Created'],
+            labels=intern(tuple(sorted(labels.items()))),
+        )
 
     def process_containers(self, container_data):
-        containers = []
-        for container in container_data:
-            created = datetime.fromtimestamp(container['Created'])
-            now = datetime.now()
-            containers.append({
-                'age': (now - created).days,
-                'id': container['Id'],
-                'image': container['Image'],
-                'names': container['Names'],
-                'status': container['Status'],
-                'command': container['Command'],
-            })
-        containers.sort(key=lambda x: (x['age'], x['image'], x['status']))
-        return containers
-
-    def emit_containers(self, containers):
-        urwid.emit_signal(self, 'container-list', containers)
-        reactor.callLater(self.frequency, self.get_containers)
-        return containers
+        # strings no longer listed are let go
+        self.strings.rotate()
+        now = datetime.now()
+        records = (self.process_container(c, now) for c in container_data)
+        return dict((record.id, record) for record in records)
 
-    def get_containers(self):
-        self.get_count = self.get_count + 1
-        if self.get_count % 3 == 0: 
-            return
-        d = threads.deferToThread(self.client.containers, all=self.all)
-        d.addCallback(self.process_containers)
-        d.addCallback(self.emit_containers)
+    def sort_containers(self, listing, base, snapshot, delta):
+        """
+        Return `listing`, of the `base` snapshot, updated to `snapshot`.
+        Only the containers in `delta` are moved unless it changed much of
+        the listing or the order changed.
+        """
+        moved = len(delta.added) + len(delta.removed) + len(delta.changed)
+        if listing.order != self.order or moved * 4 > len(listing):
+            return listing.reorder(snapshot.values(), self.order)
+        removed = [base[id] for id in delta.removed.keys() + delta.changed.keys()]
+        added = delta.added.values() + [snapshot[id] for id in delta.changed]
+        try:
+            return listing.update(removed, added)
+        except ListingError, e:
+            log.msg("Container listing out of sync, sorting it again: %s" % e)
+            return listing.reorder(snapshot.values(), self.order)
+
+    def sort(self, order):
+        """
+        List containers by `order` instead, see console.ordering.
+        """
+        self.sort_order = tuple(order)
+        return self.resort()
+
+    def resort(self):
+        if self.listing.order != self.order:
+            d = self.executor.submit(
+                'poll', self.listing.reorder, self.snapshot.values(), self.order,
+            )
+            d.addCallback(self.adopt_listing, self.listing)
+            return d
+
+    def adopt_listing(self, listing, base):
+        # unless a commit has sorted a newer snapshot in the meantime
+        if self.listing is base and listing.order == self.order:
+            self.listing = listing
+            self.publish(Delta())
+        return self.containers
+
+    def prepare_snapshot(self, base, listing, container_data):
+        """
+        Normalize a fetched list, diff it against the `base` snapshot and
+        sort it. Runs off the reactor thread; nothing is changed.
+        """
+        delta = diff_records(base, self.process_containers(container_data))
+        # unchanged records keep their identity, which views rely on
+        snapshot = apply_delta(dict(base), delta)
+        if delta:
+            listing = self.sort_containers(listing, base, snapshot, delta)
+        return base, snapshot, delta, listing
+
+    def adopt_snapshot(self, prepared, scope=None):
+        base, snapshot, delta, listing = prepared
+        if scope is not None:
+            delta.rescoped = self.scope is not None and scope != self.scope
+            self.scope = scope
+        if self.snapshot is not base:
+            # events changed the snapshot while this one was prepared
+            return self.update_snapshot(snapshot, delta.rescoped)
+        if delta:
+            self.snapshot = snapshot
+            self.listing = listing
+            self.publish(delta)
+        # the order changed while this one was prepared
+        self.resort()
+        return self.containers
+
+    def update_snapshot(self, snapshot, rescoped=False):
+        delta = diff_records(self.snapshot, snapshot)
+        delta.rescoped = rescoped
+        return self.commit(delta)
+
+    def commit(self, delta):
+        if delta:
+            # snapshots are replaced rather than changed, so that ones being
+            # prepared off the reactor thread can tell they went stale
+            snapshot = apply_delta(dict(self.snapshot), delta)
+            self.listing = self.sort_containers(self.listing, self.snapshot, snapshot, delta)
+            self.snapshot = snapshot
+            self.publish(delta)
+        return self.containers
+
+    def publish(self, delta):
+        self.version += 1
+        self.poller.changed()
+        self.emit_containers(delta)
+
+    def emit_containers(self, delta):
+        urwid.emit_signal(self, self.signal, self.containers, delta, self.version)
+
+    def replay(self, callback):
+        callback(self.containers, Delta(added=dict(self.snapshot)), self.version)
+
+    def list_containers(self, all, filters):
+        if not all and 'status' in filters:
+            # the daemon lists stopped containers too for any status filter,
+            # which only the show-all toggle should do
+            filters = dict((key, value) for key, value in filters.items() if key != 'status')
+        if not all or not self.limit:
+            return self.client.containers(all=all, filters=filters)
+        # running containers are always listed in full, only the history of
+        # stopped ones is cut down to the most recent
+        running = self.client.containers(filters=filters)
+        recent = self.client.containers(all=True, filters=filters, limit=self.limit)
+        listed = set(container['Id'] for container in running)
+        return running + [c for c in recent if c['Id'] not in listed]
+
+    def fetch_snapshot(self, base, listing, all, filters):
+        return self.prepare_snapshot(base, listing, self.list_containers(all, filters))
+
+    def fetch_containers(self):
+        d = self.executor.submit(
+            'poll', self.fetch_snapshot, self.snapshot, self.listing, self.all, self.filters,
+        )
+        d.addCallback(self.adopt_snapshot, (self.all, self.filters))
         return d
 
+    def get_containers(self):
+        self.poller.refresh()
+
+    def poke(self):
+        self.poller.poke()
+
 class ImageMonitor(object):
-    def __init__(self, client, frequency=1, all=False):
-        self.get_count = 1
+    signal = 'image-list'
+    # which tagged images always precede
+    sort_order = (('age', False), ('tag', False), ('id', False))
+    sort_columns = ('id', 'tag', 'age')
+
+    def __init__(self, client, executor, frequency=1, all=False):
         self.client = client
+        self.executor = executor
         self.frequency = frequency
-        self.all = False
-        urwid.register_signal(ImageMonitor, 'image-list')
+        self._all = False
+        self.live = False
+        self.version = 0
+        self.snapshot = {}
+        self.strings = StringTable()
+        self.expanded = {}
+        self.store = ColumnStore(
+            lambda image: (image.id, image.tag),
+            {
+                'untagged': lambda image: image.tag == '<none>:<none>',
+                'age': lambda image: image.days_old,
+            },
+            {
+                'tag': lambda image: image.tag,
+                'id': lambda image: image.id,
+            },
+        )
+        self.listing = SortedListing(self.store, self.order)
+        self.poller = Poller(self.fetch_images, frequency)
+        urwid.register_signal(ImageMonitor, self.signal)
+
+    @property
+    def order(self):
+        return (('untagged', False),) + self.sort_order
+
+    @property
+    def images(self):
+        return self.listing.records
+
+    @property
+    def all(self):
+        return self._all
+
+    @all.setter
+    def all(self, all):
+        if all != self._all:
+            self._all = all
+            self.poller.invalidate()
+
+    def watch(self, events):
+        urwid.connect_signal(events, 'connected', self.on_connected)
+        urwid.connect_signal(events, 'disconnected', self.on_disconnected)
+        urwid.connect_signal(events, 'image-event', self.on_event)
+
+    def on_connected(self, reconnect):
+        self.live = True
+        self.poller.set_periodic(False)
+        if reconnect:
+            self.poller.refresh()
+
+    def on_disconnected(self):
+        self.live = False
+        self.poller.set_periodic(True)
+        self.poller.refresh()
+
+    def on_event(self, action, id, event):
+        if action == 'delete':
+            removed = {}
+            for key in (id, id.split(':')[-1]):
+                if key in self.snapshot:
+                    removed[key] = self.snapshot[key]
+            self.commit(Delta(removed=removed))
+        else:
+            # tag, untag, pull, import and load events carry no image record
+            self.poller.refresh()
+
+    def process_image(self, image, now):
+        created = datetime.fromtimestamp(image['Created'])
+        return Image(
+            id=str(image['Id']),
+            tags=tuple(self.strings.intern(tag) for tag in image['RepoTags'] or ('<none>:<none>',)),
+            days_old=(now - created).days,
+        )
 
     def process_images(self, image_data):
-        images = []
-        for image in image_data:
-            created = datetime.fromtimestamp(image['Created'])
-            now = datetime.now()
-            time_diff = now - created
-            id = image['Id']
-            for tag in image['RepoTags']:
-                images.append({
-                    'id': id,
-                    'tag': tag,
-                    'days_old': time_diff.days,
-                })
-
-        images.sort(key=lambda x: (x['days_old'], x['tag'], x['id']))
-        return images
-
-    def emit_images(self, images):
-        urwid.emit_signal(self, 'image-list', images)
-        reactor.callLater(self.frequency, self.get_images)
-        return images
+        self.strings.rotate()
+        now = datetime.now()
+        records = (self.process_image(image, now) for image in image_data)
+        return dict((record.id, record) for record in records)
 
-    def get_images(self):
-        self.get_count = self.get_count + 1
-        if self.get_count % 3 == 0: return
-        d = threads.deferToThread(self.client.images, all=self.all)
-        d.addCallback(self.process_images)
-        d.addCallback(self.emit_images)
+    def expand_images(self, snapshot, expanded):
+        """
+        Map the id of every image to the image and an ImageTag for each of
+        its tags. The rows of images that are unchanged since `expanded`
+        was made are reused.
+        """
+        rows = {}
+        for image in snapshot.values():
+            cached = expanded.get(image.id)
+            if cached is None or cached[0] is not image:
+                cached = (image, [
+                    ImageTag(id=image.id, tag=tag, days_old=image.days_old)
+                    for tag in image.tags
+                ])
+            rows[image.id] = cached
+        return rows
+
+    def sort_images(self, listing, expanded, rows, delta):
+        """
+        Return `listing`, of the `expanded` images, updated to `rows`. Only
+        the tags of the images in `delta` are moved unless it changed much
+        of the listing or the order changed.
+        """
+        moved = len(delta.added) + len(delta.removed) + len(delta.changed)
+        if listing.order != self.order or moved * 4 > len(listing):
+            tags = [tag for image, image_tags in rows.values() for tag in image_tags]
+            return listing.reorder(tags, self.order)
+        removed = []
+        added = []
+        for id in delta.removed.keys() + delta.changed.keys():
+            removed.extend(expanded[id][1])
+        for id in delta.added.keys() + delta.changed.keys():
+            added.extend(rows[id][1])
+        try:
+            return listing.update(removed, added)
+        except ListingError, e:
+            log.msg("Image listing out of sync, sorting it again: %s" % e)
+            tags = [tag for image, image_tags in rows.values() for tag in image_tags]
+            return listing.reorder(tags, self.order)
+
+    def sort(self, order):
+        """
+        List images by `order` instead, see console.ordering.
+        """
+        self.sort_order = tuple(order)
+        return self.resort()
+
+    def resort(self):
+        if self.listing.order != self.order:
+            tags = [tag for image, image_tags in self.expanded.values() for tag in image_tags]
+            d = self.executor.submit('poll', self.listing.reorder, tags, self.order)
+            d.addCallback(self.adopt_listing, self.listing)
+            return d
+
+    def adopt_listing(self, listing, base):
+        if self.listing is base and listing.order == self.order:
+            self.listing = listing
+            self.publish(Delta())
+        return self.images
+
+    def prepare_snapshot(self, base, expanded, listing, image_data):
+        """
+        Normalize a fetched list, diff it against the `base` snapshot,
+        expand and sort it. Runs off the reactor thread; nothing is changed.
+        """
+        delta = diff_records(base, self.process_images(image_data))
+        snapshot = apply_delta(dict(base), delta)
+        if delta:
+            rows = self.expand_images(snapshot, expanded)
+            listing = self.sort_images(listing, expanded, rows, delta)
+            expanded = rows
+        return base, snapshot, delta, expanded, listing
+
+    def adopt_snapshot(self, prepared):
+        base, snapshot, delta, expanded, listing = prepared
+        if self.snapshot is not base:
+            return self.update_snapshot(snapshot)
+        if delta:
+            self.snapshot = snapshot
+            self.expanded = expanded
+            self.listing = listing
+            self.publish(delta)
+        self.resort()
+        return self.images
+
+    def update_snapshot(self, snapshot):
+        return self.commit(diff_records(self.snapshot, snapshot))
+
+    def commit(self, delta):
+        if delta:
+            self.snapshot = apply_delta(dict(self.snapshot), delta)
+            rows = self.expand_images(self.snapshot, self.expanded)
+            self.listing = self.sort_images(self.listing, self.expanded, rows, delta)
+            self.expanded = rows
+            self.publish(delta)
+        return self.images
+
+    def publish(self, delta):
+        self.version += 1
+        self.poller.changed()
+        self.emit_images(delta)
+
+    def emit_images(self, delta):
+        urwid.emit_signal(self, self.signal, self.images, delta, self.version)
+
+    def replay(self, callback):
+        callback(self.images, Delta(added=dict(self.snapshot)), self.version)
+
+    def fetch_snapshot(self, base, expanded, listing, all):
+        return self.prepare_snapshot(base, expanded, listing, self.client.images(all=all))
+
+    def fetch_images(self):
+        d = self.executor.submit(
+            'poll', self.fetch_snapshot, self.snapshot, self.expanded, self.listing, self.all,
+        )
+        d.addCallback(self.adopt_snapshot)
         return d
 
+    def get_images(self):
+        self.poller.refresh()
+
+    def poke(self):
+        self.poller.poke()
+
 
 class DockerState(object):
-    def __init__(self, host, version, frequency):
+    """
+    The single hub between the interface and the daemon. It owns the client,
+    the event stream and exactly one monitor per resource type; views
+    subscribe to a resource instead of polling the daemon themselves.
+    """
+
+    def __init__(self, host, version, frequency, pool_size=8, limit=0, cache_size=256):
         self.host = host
         self.version = version
-        self.client = docker.Client(base_url=host, version=version)
+        self.version_lock = threading.Lock()
+        self.pool = ClientPool(self.make_client, pool_size)
+        self.client = PooledClient(self.pool)
         self.frequency = frequency
-        self.images = ImageMonitor(self.client)
-        self.containers = ContainerMonitor(self.client)
+        self.executor = Executor()
+        self.cache = ResultCache(cache_size)
+        self.images = ImageMonitor(self.client, self.executor, frequency)
+        self.containers = ContainerMonitor(self.client, self.executor, frequency, limit=limit)
+        self.monitors = {
+            'containers': self.containers,
+            'images': self.images,
+        }
+        self.visible = dict((name, 0) for name in self.monitors)
+        self.events = EventStream(self.stream_client)
+        for monitor in self.monitors.values():
+            monitor.watch(self.events)
+            # nothing is polled periodically until a view shows it
+            monitor.poller.suspend()
+        urwid.connect_signal(self.events, 'connected', self.on_connected)
+        urwid.connect_signal(self.events, 'disconnected', self.cache.clear)
+        urwid.connect_signal(self.events, 'container-event', self.on_container_event)
+        urwid.connect_signal(self.events, 'image-event', self.on_image_event)
+
+    @property
+    def api_version(self):
+        if self.version == 'auto':
+            return MIN_API_VERSION
+        return self.version
+
+    def negotiate_version(self):
+        """
+        Settle on the highest API version spoken by both the daemon and
+        docker-py. Until the daemon answers, clients use MIN_API_VERSION.
+        """
+        with self.version_lock:
+            if self.version != 'auto':
+                return self.version
+            client = docker.Client(base_url=self.host, version=MIN_API_VERSION)
+            try:
+                server = client.version(api_version=False)['ApiVersion']
+            except Exception:
+                return MIN_API_VERSION
+            finally:
+                client.close()
+            if version_lt(server, DEFAULT_DOCKER_API_VERSION):
+                self.version = server
+            else:
+                self.version = DEFAULT_DOCKER_API_VERSION
+            return self.version
+
+    def make_client(self, **kwargs):
+        version = self.version
+        if version == 'auto':
+            version = self.negotiate_version()
+        return docker.Client(base_url=self.host, version=version, **kwargs)
+
+    def stream_client(self):
+        # the event stream blocks indefinitely between events
+        return self.make_client(timeout=None)
+
+    def submit(self, lane, fn, *args, **kwargs):
+        """
+        Run a blocking client call on one of the executor's lanes.
+        """
+        return self.executor.submit(lane, fn, *args, **kwargs)
+
+    def fetch(self, call, id, lane='interactive'):
+        """
+        Return a Deferred firing with the result of a read-only client call
+        such as inspect_container(id), which is cached until it goes stale
+        or an event for `id` invalidates it.
+        """
+        ttl = CONTAINER_CALLS.get(call, IMAGE_CALLS.get(call))
+        return self.cache.fetch(
+            (call, id), ttl, self.submit, lane, getattr(self.client, call), id,
+        )
+
+    def cached(self, call, id):
+        return self.cache.lookup((call, id))[0]
+
+    def on_connected(self, reconnect):
+        # events may have been missed while the stream was down
+        if reconnect:
+            self.cache.clear()
+
+    def on_container_event(self, action, id, event):
+        self.cache.invalidate(*[(call, id) for call in CONTAINER_CALLS])
+
+    def on_image_event(self, action, id, event):
+        calls = IMAGE_CALLS if action == 'delete' else ('inspect_image',)
+        # images are named by id, short id or reference
+        for key in set((id, id.split(':')[-1])):
+            self.cache.invalidate(*[(call, key) for call in calls])
+
+    def filter_containers(self, query):
+        """
+        Push what the daemon can evaluate of a container query down to it.
+        """
+        self.containers.filters = daemon_filters(query.terms, self.api_version)
+
+    def sort(self, resource, order):
+        """
+        Order the listing of a resource by `order`, see console.ordering.
+        """
+        return self.monitors[resource].sort(order)
+
+    def subscribe(self, resource, callback):
+        monitor = self.monitors[resource]
+        urwid.connect_signal(monitor, monitor.signal, callback)
+        if monitor.version:
+            monitor.replay(callback)
+
+    def unsubscribe(self, resource, callback):
+        monitor = self.monitors[resource]
+        urwid.disconnect_signal(monitor, monitor.signal, callback)
+
+    def show(self, resource):
+        self.visible[resource] += 1
+        if self.visible[resource] == 1:
+            self.monitors[resource].poller.resume()
+
+    def hide(self, resource):
+        self.visible[resource] = max(0, self.visible[resource] - 1)
+        if not self.visible[resource]:
+            self.monitors[resource].poller.suspend()
+
+    def stats(self):
+        stats = dict(
+            (name, monitor.poller.stats())
+            for name, monitor in self.monitors.items()
+        )
+        stats['lanes'] = self.executor.stats()
+        stats['pool'] = self.pool.stats()
+        stats['cache'] = self.cache.stats()
+        return stats
+
+    def start(self):
+        self.events.start()
+        for monitor in self.monitors.values():
+            monitor.poller.start()
+        reactor.addSystemEventTrigger('before', 'shutdown', self.close)
 
+    def close(self):
+        """
+        Stop polling and close every connection to the daemon.
+        """
+        self.events.stop()
+        for monitor in self.monitors.values():
+            monitor.poller.stop()
+        self.pool.close()
@@ -0,0 +1,65 @@
+from console.widgets.inspector import Inspector, SectionNode, node_path
+
+KINDS = {0: 'C', 1: 'A', 2: 'D'}
+
+
+def group_changes(diff):
+    """
+    Group the paths of a container's `diff` by directory. Return a tree of
+    nested dicts whose leaves are the kind of their file, the kind of each
+    changed path and how many changes of each kind are below each
+    directory, the root's counts being the whole diff's.
+    """
+    tree = {}
+    kinds = {}
+    counts = {(): {}}
+    for change in diff:
+        path = tuple(part for part in change.get('Path', '').split('/') if part)
+        if not path:
+            continue
+        kind = KINDS.get(change.get('Kind'), unicode(change.get('Kind', '?')))
+        kinds[path] = kind
+        node = tree
+        for depth, part in enumerate(path[:-1]):
+            child = node.get(part)
+            if not isinstance(child, dict):
+                # a changed directory listed before its contents
+                child = node[part] = {}
+            node = child
+            below = counts.setdefault(path[:depth + 1], {})
+            below[kind] = below.get(kind, 0) + 1
+        if not isinstance(node.get(path[-1]), dict):
+            node[path[-1]] = kind
+        counts[()][kind] = counts[()].get(kind, 0) + 1
+    return tree, kinds, counts
+
+
+def format_counts(counts):
+    return u", ".join(u"%s %d" % (kind, counts[kind]) for kind in sorted(counts))
+
+
+class ChangesDialog(Inspector):
+    """
+    The changes of a container, grouped by directory with the number of
+    changes of each kind below every directory.
+    """
+
+    width = ('relative', 90)
+    separator = u'/'
+
+    def __init__(self, changes, title):
+        tree, self.kinds, self.counts = changes
+        self.title = u"%s (%s)" % (title, format_counts(self.counts[()]))
+        super(ChangesDialog, self).__init__(tree)
+
+    def simplify(self, key, value):
+        return value
+
+    def display_text(self, node):
+        if node.is_root():
+            return self.title
+        path = node_path(node)
+        kind = self.kinds.get(path, u' ')
+        if isinstance(node, SectionNode):
+            return u"%s %s/ (%s)" % (kind, node.get_key(), format_counts(self.counts[path]))
+        return u"%s %s" % (kind, node.get_key())
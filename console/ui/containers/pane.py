@@ -1,7 +1,6 @@
 from datetime import datetime
 import json
 
-import docker
 import urwid
 import subprocess
 import os
@@ -9,22 +8,22 @@ import tempfile
 import sys
 import time
 import ast
-import socket
-import threading
 import logging
 import multiprocessing
 
-from contextlib import closing
-from twisted.internet import threads, reactor
 
 from console.app import app
+from console.ui.containers.changes import ChangesDialog, group_changes
 from console.ui.containers.inspect import ContainerInspector
 from console.widgets.table import Table
 from console.highlights import highlighter
+from console.query import KeywordField, LabelField, NumberField, TextField
+from console.scheduler import Debouncer
+from console.search import SearchIndex
+from console.state import CONTAINER_STATES, status_state
 from console.widgets.pane import Pane
 from console.widgets.dialogs import Prompt, MessageListBox, TableDialog
 from console.utils import catch_docker_errors
-from console.state import ContainerMonitor, ImageMonitor
 
 def split_repo_name(name):
     for idx in range(len(name)):
@@ -45,14 +44,33 @@ class AlwaysFocusedEdit(urwid.Edit):
         return super(AlwaysFocusedEdit, self).render(size, focus=True)
 
 class ContainerPane(Pane):
+    resource = 'containers'
+    query_fields = {
+        'id': TextField('id'),
+        'name': TextField('names'),
+        'image': KeywordField('image'),
+        'status': KeywordField('state', CONTAINER_STATES, text='status'),
+        'command': TextField('command'),
+        'age': NumberField('age'),
+        'label': LabelField('labels'),
+    }
+
     def __init__(self):
-        self.monitored = ContainerMonitor(docker.Client('unix://var/run/docker.sock', '1.18'))
-        self.monitored.get_containers()
+        self.monitored = app.state.containers
         self.container_data = []
-        self.containers = {}
+        self.version = None
         self.edit = AlwaysFocusedEdit("filter: ", multiline=False)
         self.listing = self.init_listing()
         self.filter = ""
+        self.index = SearchIndex(
+            lambda container: container.id,
+            lambda container: container.names + (
+                container.id, container.status, container.image,
+            ),
+            self.make_container_columns,
+            self.query_fields,
+        )
+        self.refilter = Debouncer(self.apply_filter)
         self.commands = ""
         self.marked_containers = {}
         self.in_inspect = False
@@ -64,7 +82,7 @@ class ContainerPane(Pane):
             self.edit,
         ))
         self.original_widget.focus_position = 'body'
-        urwid.connect_signal(self.monitored, 'container-list', self.set_containers)
+        app.state.subscribe(self.resource, self.set_containers)
         self.counter = 1
     
     def init_listing(self):
@@ -75,79 +93,100 @@ class ContainerPane(Pane):
             {'name': 'Status'},
             {'name': 'Names'},
         )
-        return Table(schema, header=True)
-
-    def make_container_row(self, container):
-        if "seconds" in container['status']: 
-            container['status'] = "Up 0 minutes"
-        row = self.listing.create_row({
-            'Id': container['id'][:12],
-            'Image': container['image'],
-            'Command': container['command'],
-            'Status': container['status'],
-            'Names': container['names'],
-        })
-        row.image = container['image']
-        row.container = container['id']
-        row.name = container['names']
-        row.status = container['status']
-        self.containers[row.container] = row
+        return Table(
+            schema,
+            header=True,
+            key=lambda container: container.id,
+            rowdef=self.make_container_rowdef,
+            bind=self.bind_container_row,
+        )
+
+    def make_container_rowdef(self, container):
+        return {
+            'Id': container.id[:12],
+            'Image': container.image,
+            'Command': container.command,
+            'Status': container.status,
+            'Names': list(container.names),
+        }
+
+    def make_container_columns(self, container):
+        image = container.image.lower()
+        repo = image
+        if ':' in image.rsplit('/', 1)[-1]:
+            repo = image.rsplit(':', 1)[0]
+        return {
+            'id': container.id.lower(),
+            'names': [name.lstrip('/').lower() for name in container.names],
+            'image': (image, repo),
+            'state': (status_state(container.status),),
+            'status': container.status.lower(),
+            'command': container.command.lower(),
+            'age': container.age,
+            'labels': dict(
+                (key.lower(), value.lower())
+                for key, value in container.labels
+            ),
+        }
+
+    def bind_container_row(self, row, container):
+        row.image = container.image
+        row.container = container.id
+        row.name = container.names
+        row.status = container.status
         return row
 
-    def set_containers(self, containers, force=False):
-        # save the current position
-        _, current_focus = self.listing.get_focus()
+    def set_containers(self, containers, delta=None, version=None, force=False):
+        if version is not None and version == self.version and not force:
+            return
+
+        d = app.state.submit('process', self.prepare_listing, containers, self.filter)
+        d.addCallback(self.show_listing, containers, delta, version)
 
-        if containers == self.container_data and not force:
+    def prepare_listing(self, containers, filter):
+        # runs off the reactor thread
+        index = self.index.rebuild(containers)
+        return index.results(filter)
+
+    def show_listing(self, results, containers, delta, version):
+        if version is not None and self.version is not None and version < self.version:
             return
+        self.index = results.index
+        if results.text == self.filter:
+            self.show_results(results)
+        else:
+            self.apply_filter()
 
-        self.listing.clear()
-        self.old_containers = self.containers
-        self.containers = {}
-
-        running = [c for c in containers if 'Exited' not in c['status']]
-        stopped = [c for c in containers if 'Exited' in c['status']]
-
-        filter = self.filter.lower()
-
-        def remove_highlight(row):
-            highlighter.remove(row)
-
-        for container in running:
-            in_names = any(filter in name.lower() for name in container['names'])
-            in_id = filter in container['id'].lower()
-            in_status = filter in container['status'].lower()
-            in_image = filter in container['image'].lower()
-            row = self.make_container_row(container)
-            if any((in_names, in_id, in_status, in_image)):
-                self.listing.walker.append(row)
-                if self.old_containers and row.container not in self.old_containers:
-                    highlighter.apply(row, 'created', 'created')
-                    reactor.callLater(1, highlighter.remove, row)
-
-        for container in stopped:
-            in_names = any(filter in name.lower() for name in container['names'])
-            in_id = filter in container['id'].lower()
-            in_status = filter in container['status'].lower()
-            in_image = filter in container['image'].lower()
-            row = self.make_container_row(container)
-            if any((in_names, in_id, in_status, in_image)):
-                self.listing.walker.append(row)
-                if self.old_containers and row.container not in self.old_containers:
-                    highlighter.apply(row, 'created', 'created')
-                    reactor.callLater(1, highlighter.remove, row)
+        # containers listed again after the filters changed aren't new
+        if delta and not delta.rescoped and self.version is not None:
+            for key in delta.added:
+                highlighter.apply(self.listing, key, 'created', 'created', duration=1)
 
         self.container_data = containers
-        self.listing.set_focus(current_focus)
-        self.listing.fix_focus()
-        app.draw_screen()
+        if version is not None:
+            self.version = version
+        app.redraw()
 
-    def thread(self):
-        return True
+    def apply_filter(self):
+        d = app.state.submit('process', self.index.results, self.filter)
+        d.addCallback(self.show_results)
+
+    def show_results(self, results):
+        # results for a superseded index or filter are followed by fresh ones
+        if results.index is not self.index or results.text != self.filter:
+            return
+        if results.error:
+            self.edit.set_caption("filter (%s): " % results.error)
+            return
+        self.edit.set_caption("filter: ")
+        # the daemon only pre-filters, the query is still applied here
+        app.state.filter_containers(results.query)
+        self.listing.set_records(results.records, results.positions)
+        app.redraw()
 
     def keypress(self, size, event):
         self.size = size
-        self.since_time = time.time()
+        self.monitored.poke()
         if event == 'close-dialog':
             if self.in_inspect:
                 self.in_inspect = False
@@ -155,6 +194,7 @@ class ContainerPane(Pane):
                 self.in_diff = False
             if self.in_top:
                 self.in_top = False
+            self.prefetch()
         if event == 'scroll-close':
             event = 'close-dialog'
         if self.dialog:
@@ -166,37 +206,32 @@ class ContainerPane(Pane):
                     return super(ContainerPane, self).keypress(size, event)
                 else:
                     self.filter = self.edit.edit_text
-                    self.set_containers(self.container_data, force=True)
+                    self.refilter.trigger()
                     self.on_unmark()
 
-        if event not in ['next-container', 'prev-container', 'set-mark', 'unmark-containers']:
-            thread = threading.Thread(name='thread', target=self.thread)
-            listener = threading.Thread(name='listener', target=self.listener)
-            listener.setDaemon(True)
-            listener.start()
-            thread.start()
-
     def handle_event(self, event):
         if event == 'next-container':
             self.on_next()
             if self.in_inspect or self.in_diff or self.in_top:
-                self.keypress(self.size, 'scroll-close')
+                # the open dialog is swapped for the new row's
                 if self.in_inspect:
                     self.on_inspect()
                 if self.in_diff:
                     self.on_diff()
                 if self.in_top:
                     self.on_top()
+                self.prefetch(*self.followed_calls())
         elif event== 'prev-container':
             self.on_prev()
             if self.in_inspect or self.in_diff or self.in_top:
-                self.keypress(self.size, 'scroll-close')
+                # the open dialog is swapped for the new row's
                 if self.in_inspect:
                     self.on_inspect()
                 if self.in_diff:
                     self.on_diff()
                 if self.in_top:
                     self.on_top()
+                self.prefetch(*self.followed_calls())
         elif event == 'toggle-show-all':
             self.on_all()
             self.monitored.get_containers()
@@ -207,6 +242,7 @@ class ContainerPane(Pane):
         elif event == 'inspect-details':
             self.in_inspect = True
             self.on_inspect()
+            self.prefetch(*self.followed_calls())
         elif event == 'set-mark':
             self.on_mark()
         elif event == 'run-container(s)':
@@ -219,6 +255,7 @@ class ContainerPane(Pane):
         elif event == 'inspect-changes':
             self.in_diff = True
             self.on_diff()
+            self.prefetch(*self.followed_calls())
         elif event == 'restart-container':
             self.on_restart()
         elif event == 'kill-container':
@@ -234,14 +271,25 @@ class ContainerPane(Pane):
         elif event == 'top-container':
             self.in_top = True
             self.on_top()
+            self.prefetch(*self.followed_calls())
         else:
             return super(ContainerPane, self).handle_event(event)
 
+    def followed_calls(self):
+        calls = []
+        if self.in_inspect:
+            calls.append('inspect_container')
+        if self.in_diff:
+            calls.append('diff')
+        if self.in_top:
+            calls.append('top')
+        return calls
+
     def make_screen_command(self):
         row = 0
         none_marked = True
-        for k, v in self.marked_containers.items():
-            if v == "marked" and 'Exited' not in k.status:
+        for k in self.marked_containers.values():
+            if 'Exited' not in k.status:
                 self.commands += "screen %d docker exec -it %s bash\n" % (row, k.container)
                 self.commands += "title %s\n" % k.image
                 row += 1
@@ -260,7 +308,7 @@ class ContainerPane(Pane):
             return
         subprocess.call(["screen", "-c" "%s" % temp.name])
         temp.close()
-        app.client.close()
+        app.state.close()
         raise urwid.ExitMainLoop
 
     def make_tmux_command(self):
@@ -268,8 +316,8 @@ class ContainerPane(Pane):
         self.commands += "tmux new-session -d -s run-containers\n"
         row = 1
         none_marked = True
-        for k, v in self.marked_containers.items():
-            if v == "marked" and 'Exited' not in k.status:
+        for k in self.marked_containers.values():
+            if 'Exited' not in k.status:
                 self.commands += "tmux new-window -t run-containers:%d -n '%s' 'docker exec -it %s bash'\n" % (row, k.image, k.container)
                 row += 1
                 none_marked = False
@@ -287,7 +335,7 @@ class ContainerPane(Pane):
             return
         subprocess.call(["rbash", "%s" % temp.name])
         temp.close()
-        app.client.close()
+        app.state.close()
         raise urwid.ExitMainLoop
 
     def make_command(self, which_mux):
@@ -313,19 +361,16 @@ class ContainerPane(Pane):
 
     def on_mark(self):
         marked_widget, marked_id = self.listing.get_focus()
-        if (marked_widget in self.marked_containers and 
-                self.marked_containers[marked_widget] == "marked"):
-            del self.marked_containers[marked_widget]
+        if marked_widget.container in self.marked_containers:
+            del self.marked_containers[marked_widget.container]
             self.listing.unmark()
         else:
-            self.marked_containers[marked_widget] = "marked"
+            self.marked_containers[marked_widget.container] = marked_widget
             self.listing.mark()
 
     def on_unmark(self):
-        for key, value in self.marked_containers.items():
-            if value == "marked":
-                key.set_attr_map({None:None})
-                del self.marked_containers[key]
+        self.marked_containers.clear()
+        self.listing.unmark_all()
 
     def on_all(self):
         self.on_unmark()
@@ -333,32 +378,28 @@ class ContainerPane(Pane):
     
     def dict_on_delete(self):
         none_marked = True
-        for key, value in self.marked_containers.items():
-            if value == "marked":
-                widget = key
-                self.on_delete(widget)
-                del self.marked_containers[key]
-                none_marked = False
+        for widget in self.marked_containers.values():
+            self.on_delete(widget)
+            none_marked = False
+        self.marked_containers.clear()
         if none_marked:
             widget, idx = self.listing.get_focus()
             self.on_delete(widget)
 
     @catch_docker_errors
     def on_delete(self, widget):
-        highlighter.apply(widget, 'deleted', 'deleted')
-        reactor.callLater(2.5, highlighter.remove, widget)
-        return threads.deferToThread(app.client.remove_container, widget.container)
+        highlighter.apply(self.listing, widget.key, 'deleted', 'deleted', duration=2.5)
+        return app.state.submit('bulk', app.client.remove_container, widget.container)
 
     @catch_docker_errors
     def perform_start(self, widget):
-        return threads.deferToThread(app.client.start, widget)
+        return app.state.submit('bulk', app.client.start, widget)
 
     def on_start(self):
         none_marked = True
-        for key, value in self.marked_containers.items():
-            if value == "marked":
-                self.perform_start(key.container)
-                none_marked = False
+        for widget in self.marked_containers.values():
+            self.perform_start(widget.container)
+            none_marked = False
         if none_marked:
             widget, idx = self.listing.get_focus()
             self.perform_start(widget.container)
@@ -367,14 +408,13 @@ class ContainerPane(Pane):
 
     @catch_docker_errors
     def perform_stop(self, widget):
-        return threads.deferToThread(app.client.stop, widget)
+        return app.state.submit('bulk', app.client.stop, widget)
 
     def on_stop(self):
         none_marked = True
-        for key, value in self.marked_containers.items():
-            if value == "marked":
-                self.perform_stop(key.container)
-                none_marked = False
+        for widget in self.marked_containers.values():
+            self.perform_stop(widget.container)
+            none_marked = False
         if none_marked:
             widget, idx = self.listing.get_focus()
             self.perform_stop(widget.container)
@@ -383,15 +423,14 @@ class ContainerPane(Pane):
 
     @catch_docker_errors
     def perform_pause(self, widget):
-        return threads.deferToThread(app.client.pause, widget)
+        return app.state.submit('bulk', app.client.pause, widget)
         
     def on_pause(self):
         none_marked = True
         if len(self.marked_containers) > 0:
-            for key, value in self.marked_containers.items():
-                if value == "marked":
-                    self.perform_pause(key.container)                
-                    none_marked = False
+            for widget in self.marked_containers.values():
+                self.perform_pause(widget.container)                
+                none_marked = False
         if none_marked:
             widget, idx = self.listing.get_focus()
             self.perform_pause(widget.container)
@@ -400,14 +439,13 @@ class ContainerPane(Pane):
 
     @catch_docker_errors
     def perform_unpause(self, widget):
-        return threads.deferToThread(app.client.unpause, widget)
+        return app.state.submit('bulk', app.client.unpause, widget)
 
     def on_unpause(self):
         none_marked = True
-        for key, value in self.marked_containers.items():
-            if value == "marked":
-                self.perform_unpause(key.container)
-                none_marked = False
+        for widget in self.marked_containers.values():
+            self.perform_unpause(widget.container)
+            none_marked = False
         if none_marked:
             widget, idx = self.listing.get_focus()
             self.perform_unpause(widget.container)
@@ -416,14 +454,13 @@ class ContainerPane(Pane):
     
     @catch_docker_errors
     def perform_kill(self, widget):
-        return threads.deferToThread(app.client.kill, widget)
+        return app.state.submit('bulk', app.client.kill, widget)
 
     def on_kill(self):
         none_marked = True
-        for key, value in self.marked_containers.items():
-            if value == "marked":
-                self.perform_kill(key.container)
-                none_marked = False
+        for widget in self.marked_containers.values():
+            self.perform_kill(widget.container)
+            none_marked = False
         if none_marked:
             widget, idx = self.listing.get_focus()
             self.perform_kill(widget.container)
@@ -435,7 +472,7 @@ class ContainerPane(Pane):
         name, tag = split_repo_name(repo_name)
         repo_name = name + ":" + (tag or 'latest')
         self.close_dialog()
-        return threads.deferToThread(app.client.commit, container, name, tag or 'latest')
+        return app.state.submit('bulk', app.client.commit, container, name, tag or 'latest')
 
     def on_commit(self):
         widget, idx = self.listing.get_focus()
@@ -445,14 +482,13 @@ class ContainerPane(Pane):
 
     @catch_docker_errors
     def perform_restart(self, widget):
-        return threads.deferToThread(app.client.restart, widget)
+        return app.state.submit('bulk', app.client.restart, widget)
 
     def on_restart(self):
         none_marked = True
-        for key, value in self.marked_containers.items():
-            if value == "marked":
-                self.perform_restart(key.container)
-                none_marked = False
+        for widget in self.marked_containers.values():
+            self.perform_restart(widget.container)
+            none_marked = False
         if none_marked:
             widget, idx = self.listing.get_focus()
             self.perform_restart(widget.container)
@@ -462,7 +498,7 @@ class ContainerPane(Pane):
     @catch_docker_errors
     def perform_rename(self, container, name):
         self.close_dialog()
-        return threads.deferToThread(app.client.rename, container, name)
+        return app.state.submit('bulk', app.client.rename, container, name)
         
     def on_rename(self):
         widget, idx = self.listing.get_focus()
@@ -474,36 +510,20 @@ class ContainerPane(Pane):
     @catch_docker_errors
     def on_inspect(self):
         widget, idx = self.listing.get_focus()
-        d = threads.deferToThread(app.client.inspect_container, widget.container)
-        d.addCallback(lambda data: self.show_dialog(ContainerInspector(data)))
+        d = self.fetch_latest('inspect_container', widget.container)
+        d.addCallback(lambda data: self.swap_dialog(ContainerInspector(data)))
         return d
 
-    def _show_diff(self, diff_json, container_id):
-        for d in diff_json:
-            if d['Kind'] == 0:
-                d['Kind'] = 'Change'
-            elif d['Kind'] == 1:
-                d['Kind'] = 'Add'
-            elif d['Kind'] == 2:
-                d['Kind'] = 'Delete'
-        diffs = [(d.get('Kind',''), d.get('Path','')) for d in diff_json]
-        dialog = TableDialog(
-            "Changes in %s" % container_id[:12],
-            diffs,
-            [
-                {'value':"kind", 'weight':1, 'align':'center'},
-                {'value':"path", 'weight':4, 'align':'center'}
-            ]
-        )
-        dialog.width = ('relative', 90)
-        self.show_dialog(dialog, )
+    def _show_diff(self, changes, container_id):
+        self.swap_dialog(ChangesDialog(changes, "Changes in %s" % container_id[:12]))
 
     @catch_docker_errors
     def on_diff(self):
         widget, idx = self.listing.get_focus()
-        d = threads.deferToThread(app.client.diff, widget.container)
+        # large diffs are grouped by directory off the reactor thread
+        d = self.fetch_latest('diff', widget.container, group_changes)
         d.addCallback(self._show_diff, widget.container)
-        d.addCallback(lambda r: app.draw_screen())
+        d.addCallback(lambda r: app.redraw())
         return d
 
     def _show_top(self, top_json, container_id):
@@ -524,22 +544,12 @@ class ContainerPane(Pane):
             ]
         )
         dialog.width = ('relative', 90)
-        self.show_dialog(dialog, )
+        self.swap_dialog(dialog)
 
     @catch_docker_errors
     def on_top(self):
         widget, idx = self.listing.get_focus()
-        d = threads.deferToThread(app.client.top, widget.container)
+        d = self.fetch_latest('top', widget.container)
         d.addCallback(self._show_top, widget.container)
-        d.addCallback(lambda r: app.draw_screen())
+        d.addCallback(lambda r: app.redraw())
         return d
-
-    def listener(self):
-        s = socket.socket(socket.AF_UNIX)
-        s.connect('/var/run/docker.sock')
-        with closing(s):
-            s.sendall(b'GET /events?since=%d HTTP/1.1\n\n' % self.since_time)
-            header = s.recv(4096)
-            chunk = s.recv(4096)
-            self.monitored.get_containers()
-
@@ -2,33 +2,43 @@ import urwid
 
 import os
 import json
-import docker
-import threading
-import socket
 import time
 
-from contextlib import closing
-from twisted.internet import threads, reactor
 
 from console.app import app
 from console.ui.images.inspect import ImageInspector
 from console.widgets.extra import AlwaysFocusedEdit
 from console.widgets.table import Table, TableCell
 from console.highlights import highlighter
+from console.query import NumberField, TextField
+from console.scheduler import Debouncer
+from console.search import SearchIndex
 from console.widgets.pane import Pane
 from console.widgets.dialogs import Prompt, MessageListBox, TableDialog
 from console.utils import catch_docker_errors, split_repo_name
-from console.state import ImageMonitor
 
 class ImagePane(Pane):
+    resource = 'images'
+    query_fields = {
+        'id': TextField('id'),
+        'tag': TextField('tag'),
+        'age': NumberField('age'),
+    }
+
     def __init__(self):
-        self.monitored = ImageMonitor(docker.Client('unix://var/run/docker.sock', '1.18'))
-        self.monitored.get_images()
+        self.monitored = app.state.images
         self.image_data = []
-        self.images = {}
+        self.version = None
         self.edit = AlwaysFocusedEdit("filter: ", multiline=False)
         self.listing = self.init_listing()
         self.filter = ""
+        self.index = SearchIndex(
+            self.image_key,
+            lambda image: (image.tag, image.id),
+            self.make_image_columns,
+            self.query_fields,
+        )
+        self.refilter = Debouncer(self.apply_filter)
         self.marked_widgets = {}
         self.in_history = False
         self.in_inspect = False
@@ -38,7 +48,7 @@ class ImagePane(Pane):
             self.edit,
         ))
         self.original_widget.focus_position = 'body'
-        urwid.connect_signal(self.monitored, 'image-list', self.set_images)
+        app.state.subscribe(self.resource, self.set_images)
 
     def init_listing(self):
         schema = (
@@ -46,74 +56,100 @@ class ImagePane(Pane):
             {'name': 'Id', 'align':'center'},
             {'name': 'Created'},
         )
-        return Table(schema, header=True)
-
-    def make_image_row(self, image):
-        row = self.listing.create_row({
-            'Tag': image['tag'],
-            'Id': image['id'][:12],
-            'Created': "%s days ago" % image['days_old'],
-        })
-        row.tag = image['tag']
-        row.image = image['id']
-        self.images[row.tag] = row
+        return Table(
+            schema,
+            header=True,
+            key=self.image_key,
+            rowdef=self.make_image_rowdef,
+            bind=self.bind_image_row,
+        )
+
+    def image_key(self, image):
+        # untagged images all share the same placeholder tag
+        if image.tag == '<none>:<none>':
+            return image.id
+        return image.tag
+
+    def make_image_rowdef(self, image):
+        return {
+            'Tag': image.tag,
+            'Id': image.id[:12],
+            'Created': "%s days ago" % image.days_old,
+        }
+
+    def make_image_columns(self, image):
+        return {
+            'id': image.id.lower(),
+            'tag': image.tag.lower(),
+            'age': image.days_old,
+        }
+
+    def bind_image_row(self, row, image):
+        row.tag = image.tag
+        row.image = image.id
         return row
 
-    def set_images(self, images, force=False):
-        # save the current position
-        _, current_focus = self.listing.get_focus()
+    def set_images(self, images, delta=None, version=None, force=False):
+        if version is not None and version == self.version and not force:
+            return
 
-        if images == self.image_data and not force:
+        d = app.state.submit('process', self.prepare_listing, images, delta, self.filter)
+        d.addCallback(self.show_listing, images, version)
+
+    def prepare_listing(self, images, delta, filter):
+        # runs off the reactor thread
+        index = self.index.rebuild(images)
+        created = set()
+        if delta:
+            created = set(
+                self.image_key(image) for image in images
+                if image.id in delta.added
+            )
+        return index.results(filter), created
+
+    def show_listing(self, prepared, images, version):
+        if version is not None and self.version is not None and version < self.version:
             return
+        results, created = prepared
+        self.index = results.index
+        if results.text == self.filter:
+            self.show_results(results)
+        else:
+            self.apply_filter()
 
-        self.listing.clear()
-        self.old_images = self.images
-        self.images = {}
-
-        untagged = [i for i in images if i['tag'] == '<none>:<none>']
-        tagged = [i for i in images if i['tag'] != '<none>:<none>']
-
-        filter = self.filter.lower()
-
-        def remove_highlight(row):
-            highlighter.remove(row)
-
-        for image in tagged:
-            in_tag = filter in image['tag'].lower()
-            in_id = filter in image['id'].lower()
-            row = self.make_image_row(image)
-            if in_tag or in_id:
-                self.listing.walker.append(row)
-                if self.old_images and row.tag not in self.old_images:
-                    highlighter.apply(row, 'created', 'created')
-                    reactor.callLater(1, highlighter.remove, row)
-
-        for image in untagged:
-            in_tag = filter in image['tag'].lower()
-            in_id = filter in image['id'].lower()
-            row = self.make_image_row(image)
-            if in_tag or in_id:
-                self.listing.walker.append(row)
-                if self.old_images and row.tag not in self.old_images:
-                    highlighter.apply(row, 'created', 'created')
-                    reactor.callLater(1, highlighter.remove, row)
+        if self.version is not None:
+            for key in created:
+                highlighter.apply(self.listing, key, 'created', 'created', duration=1)
 
         self.image_data = images
-        self.listing.set_focus(current_focus)
-        self.listing.fix_focus()
-        app.draw_screen()
+        if version is not None:
+            self.version = version
+        app.redraw()
+
+    def apply_filter(self):
+        d = app.state.submit('process', self.index.results, self.filter)
+        d.addCallback(self.show_results)
 
-    def thread(self):
-        return True
+    def show_results(self, results):
+        # results for a superseded index or filter are followed by fresh ones
+        if results.index is not self.index or results.text != self.filter:
+            return
+        if results.error:
+            self.edit.set_caption("filter (%s): " % results.error)
+            return
+        self.edit.set_caption("filter: ")
+        self.listing.set_records(results.records, results.positions)
+        app.redraw()
 
     def keypress(self, size, event):
         self.size = size
-        self.since_time = time.time()
+        self.monitored.poke()
         if event == 'close-dialog':
             if self.in_history:
                 self.in_history = False
             if self.in_inspect:
                 self.in_inspect = False
+            self.prefetch()
         if event == 'scroll-close':
             event = 'close-dialog'
         if self.dialog:
@@ -125,32 +161,27 @@ class ImagePane(Pane):
                     return super(ImagePane, self).keypress(size, event)
                 else:
                     self.filter = self.edit.edit_text
-                    self.set_images(self.image_data, force=True)
-        
-        if event not in ['next-image', 'prev-image', 'set-mark', 'unmark-images']:
-            thread = threading.Thread(target=self.thread)
-            listener = threading.Thread(target=self.listener)
-            listener.setDaemon(True)
-            listener.start()
-            thread.start()
+                    self.refilter.trigger()
 
     def handle_event(self, event):
         if event == 'next-image':
             self.on_next()
             if self.in_history or self.in_inspect:
-                self.keypress(self.size, 'scroll-close')
+                # the open dialog is swapped for the new row's
                 if self.in_history:
                     self.on_history()
                 if self.in_inspect:
                     self.on_inspect()
+                self.prefetch(*self.followed_calls())
         elif event == 'prev-image':
             self.on_prev()
             if self.in_history or self.in_inspect:
-                self.keypress(self.size, 'scroll-close')
+                # the open dialog is swapped for the new row's
                 if self.in_history:
                     self.on_history()
                 if self.in_inspect:
                     self.on_inspect()
+                self.prefetch(*self.followed_calls())
         elif event == 'toggle-show-all':
             self.on_all()
             self.monitored.get_images()
@@ -161,6 +192,7 @@ class ImagePane(Pane):
         elif event == 'inspect-details':
             self.in_inspect = True
             self.on_inspect()
+            self.prefetch(*self.followed_calls())
         elif event == 'help':
             self.on_help()
         elif event == 'set-mark':
@@ -170,6 +202,7 @@ class ImagePane(Pane):
         elif event == 'view-history':
             self.in_history = True
             self.on_history()
+            self.prefetch(*self.followed_calls())
         elif event == 'push-image':
             self.monitored.get_images()
             self.push()
@@ -180,6 +213,14 @@ class ImagePane(Pane):
             self.monitored.get_images()
             return super(ImagePane, self).handle_event(event)
 
+    def followed_calls(self):
+        calls = []
+        if self.in_history:
+            calls.append('history')
+        if self.in_inspect:
+            calls.append('inspect_image')
+        return calls
+
     def on_next(self):
         self.listing.next()
 
@@ -191,19 +232,16 @@ class ImagePane(Pane):
 
     def on_marked(self):
         marked_widget, idx = self.listing.get_focus()
-        if (marked_widget in self.marked_widgets and 
-                self.marked_widgets[marked_widget] == "marked"):
-            self.marked_widgets[marked_widget] = "unmarked"
+        if marked_widget.key in self.marked_widgets:
+            del self.marked_widgets[marked_widget.key]
             self.listing.unmark()
         else:
-            self.marked_widgets[marked_widget] = "marked"
+            self.marked_widgets[marked_widget.key] = marked_widget
             self.listing.mark()
 
     def on_unmark(self):
-        for key, value in self.marked_widgets.items():
-            if value == "marked":
-                self.marked_widgets[key] = "unmarked"
-                key.set_attr_map({None:None})
+        self.marked_widgets.clear()
+        self.listing.unmark_all()
 
     def _show_history(self, history_json, image_id):
         history = history_json
@@ -217,21 +255,20 @@ class ImagePane(Pane):
             ]
         )
         dialog.width = ('relative', 90)
-        self.show_dialog(dialog, )
+        self.swap_dialog(dialog)
 
     @catch_docker_errors
     def on_history(self):
         widget, idx = self.listing.get_focus()
-        d = threads.deferToThread(app.client.history, widget.image)
+        d = self.fetch_latest('history', widget.image)
         d.addCallback(self._show_history, widget.image)
-        d.addCallback(lambda r: app.draw_screen())
+        d.addCallback(lambda r: app.redraw())
         return d
 
     def delete_marked(self):
         none_marked = True
-        for key, value in self.marked_widgets.items():
-            if value == "marked" and key.tag != '<none>:<none>':
-                widget = key
+        for key, widget in self.marked_widgets.items():
+            if widget.tag != '<none>:<none>':
                 self.on_delete(widget)
                 del self.marked_widgets[key]
                 none_marked = False
@@ -242,12 +279,11 @@ class ImagePane(Pane):
 
     @catch_docker_errors
     def on_delete(self, widget):
-        highlighter.apply(widget, 'deleted', 'deleted')
-        reactor.callLater(10, highlighter.remove, widget)
+        highlighter.apply(self.listing, widget.key, 'deleted', 'deleted', duration=10)
         if widget.tag == "<none>:<none>":
             widget.tag = widget.image
-        d = threads.deferToThread(app.client.remove_image, widget.tag)
-        d.addErrback(lambda _: highlighter.remove(widget) or _)
+        d = app.state.submit('bulk', app.client.remove_image, widget.tag)
+        d.addErrback(lambda _: highlighter.remove(self.listing, widget.key) or _)
         return d
 
     @catch_docker_errors
@@ -255,7 +291,7 @@ class ImagePane(Pane):
         name, tag = split_repo_name(repo_name)
         repo_name = name + ":" + (tag or 'latest')
         self.close_dialog()
-        return threads.deferToThread(app.client.tag, image, name, tag or 'latest')
+        return app.state.submit('bulk', app.client.tag, image, name, tag or 'latest')
 
     def on_tag(self):
         widget, idx = self.listing.get_focus()
@@ -267,8 +303,8 @@ class ImagePane(Pane):
     def push(self):
         widget, idx = self.listing.get_focus()
         name, tag = split_repo_name(widget.tag)
-        highlighter.apply(widget, 'uploading', 'uploading_focus')
-        d = threads.deferToThread(app.client.push, name)
+        highlighter.apply(self.listing, widget.key, 'uploading', 'uploading_focus')
+        d = app.state.submit('stream', app.client.push, name)
 
         def handle_response(r):
             r = r.replace("}{", "},{")
@@ -277,7 +313,7 @@ class ImagePane(Pane):
             r = "[%s]" % r
             messages = [d.get('status') or d.get('error') for d in json.loads(r)]
             self.show_dialog(MessageListBox(messages, title='Push Response', width=100))
-            reactor.callLater(5.0, highlighter.remove, widget)
+            highlighter.apply(self.listing, widget.key, 'uploading', 'uploading_focus', duration=5.0)
 
         d.addCallback(handle_response)
         return d
@@ -286,7 +322,7 @@ class ImagePane(Pane):
     def perform_pull(self, repo_name):
         name, tag = split_repo_name(repo_name)
         self.close_dialog()
-        return threads.deferToThread(app.client.pull, name, tag or 'latest')
+        return app.state.submit('stream', app.client.pull, name, tag or 'latest')
 
     def pull(self):
         repo_name = ''
@@ -296,16 +332,6 @@ class ImagePane(Pane):
     @catch_docker_errors
     def on_inspect(self):
         widget, idx = self.listing.get_focus()
-        d = threads.deferToThread(app.client.inspect_image, widget.image)
-        d.addCallback(lambda data: self.show_dialog(ImageInspector(data)))
+        d = self.fetch_latest('inspect_image', widget.image)
+        d.addCallback(lambda data: self.swap_dialog(ImageInspector(data)))
         return d
-
-    def listener(self):
-        s = socket.socket(socket.AF_UNIX)
-        s.connect('/var/run/docker.sock')
-        with closing(s):
-            s.sendall(b'GET /events?since=%d HTTP/1.1\n\n' % self.since_time)
-            header = s.recv(4096)
-            chunk = s.recv(4096)
-            self.monitored.get_images()
-
@@ -20,6 +20,7 @@ class ImagesTab(Tab):
         'ctrl k': ('set-mark', 'select current image'),
         'ctrl u': ('unmark-images', 'unmark all selected images'),
         'ctrl l': ('pull-image', 'pull image from repository'),
+        'meta s': ('sort-listing', 'sort images by other columns'),
     }
 
     def get_content(self):
@@ -47,6 +48,7 @@ class ContainersTab(Tab):
         'ctrl w': ('start-container', 'start the selected container'),
         'ctrl y': ('stop-container', 'stop the selected container'),
         'shift tab': ('top-container', 'display running processes'),
+        'meta s': ('sort-listing', 'sort containers by other columns'),
     }
 
     def get_content(self):
@@ -1,10 +1,15 @@
 import docker
 
+from twisted.internet import defer
+from twisted.python.failure import Failure
+
 from console.app import app
 from console.widgets.dialogs import MessageBox
 
 
 def popup_failure(e, self):
+    if isinstance(e, Failure) and e.check(defer.CancelledError):
+        return
     self.close_dialog()
 
     e.trap(docker.errors.APIError)
@@ -15,7 +20,7 @@ def popup_failure(e, self):
             title="HTTP Error: " + str(e.response.status_code),
         )
     )
-    app.draw_screen()
+    app.redraw()
 
 
 def catch_docker_errors(fn):
@@ -1,6 +1,6 @@
 import urwid
 
-from console.widgets.table import TableCell, TableRow, DeadTable
+from console.widgets.table import Table, TableRow
 from console.widgets.listbox import FancyListBox
 from console.app import app
 
@@ -17,6 +17,16 @@ class PopupPile(urwid.Pile):
     def set_callback(self, callback):
         self.callback = callback
 
+    def takes_key(self, key):
+        """
+        Whether `key` is typed into the dialog as it is rather than mapped
+        to an event.
+        """
+        return False
+
+    def on_close(self):
+        pass
+
     def on_submit(self):
         self.callback(None)
 
@@ -48,7 +58,7 @@ class MessageListBox(PopupPile):
                     urwid.Text(message, align=text_align)
                     for message in messages
                 ]),
-                min(len(messages) + 2, int(app.screen.get_cols_rows()[1] * .8))
+                min(len(messages) + 2, int(app.screen_size()[1] * .8))
             )
         ])
 
@@ -74,35 +84,37 @@ class Prompt(PopupPile):
             return self.edit.keypress(size, event)
 
 class TableDialog(PopupPile):
+    """
+    A scrollable table of `binds`, a list of rows of cell values, under
+    `headers` of cell options. Rows are only built as they are scrolled
+    into view, so large results open and scroll at the same speed.
+    """
+
     def __init__(self, title, binds, headers=None):
         self.title = title
-        super(TableDialog, self).__init__([
-            self.generate_table(title, binds, headers),
-        ])
-
-    def generate_table(self, title, binds, headers):
-        rows = []
-        for row in binds:
-            cells = []
-            for idx, cell in enumerate(row):
-                if headers:
-                    cells.append({'value':cell, 'weight':headers[idx].get('weight'), 
-                        'align':headers[idx].get('align')})
-                else:
-                    cells.append(TableCell(cell))
-            rows.append(TableRow(cells))
-
-        table = DeadTable()
+        self.table = self.generate_table(title, binds, headers)
+        height = max(1, min(len(binds), int(app.screen_size()[1] * .8)))
+        items = [urwid.BoxAdapter(self.table, height)]
         if headers:
-            table.set_header(
-                urwid.Pile([
-                    TableRow(headers),
-                    urwid.BoxAdapter(
-                        urwid.SolidFill('-'),
-                        1,
-                    )
-                ])
-            )
-        table.set_rows(rows)
+            # the header stays in place while the rows scroll
+            items[:0] = [urwid.WidgetDisable(TableRow(headers)), urwid.Divider('-')]
+        super(TableDialog, self).__init__(items, focus_item=len(items) - 1)
 
-        return urwid.WidgetDisable(table)
+    def generate_table(self, title, binds, headers):
+        schema = [
+            {
+                'name': idx,
+                'weight': (header.get('weight') if headers else None) or 1,
+                'align': (header.get('align') if headers else None) or 'left',
+            }
+            for idx, header in enumerate(headers or (binds[0] if binds else []))
+        ]
+        table = Table(schema, rowdef=lambda record: dict(enumerate(record[1])))
+        table.set_rows(binds)
+        return table
+
+    def get_scroll(self):
+        return self.table.get_scroll()
+
+    def set_scroll(self, scroll):
+        self.table.set_scroll(scroll)
@@ -1,83 +1,306 @@
+"""
+A collapsible tree of an inspected document. Nodes and their widgets are
+only built when they are scrolled into view, and every section below the
+ones an inspector opens starts collapsed, so opening a large document only
+costs the lines on screen.
+
+Typing searches the document, see DocumentIndex, which is built on the
+dialog lane the first time. Enter jumps to the next match and meta enter
+to the previous one, expanding the sections above it.
+"""
+from bisect import bisect_left, bisect_right
+
 import urwid
 
+from twisted.internet import defer
+
 from console.app import app
+from console.search import DocumentIndex
 from console.widgets.dialogs import PopupPile
+from console.widgets.extra import AlwaysFocusedEdit
 from console.widgets.listbox import FancyListBox
 
 
+def is_branch(value):
+    return isinstance(value, (dict, list, tuple))
+
+
+def node_path(node):
+    """
+    Return the keys leading from the root of the document to `node`.
+    """
+    path = []
+    while not node.is_root():
+        path.append(node.get_key())
+        node = node.get_parent()
+    return tuple(reversed(path))
+
+
+class FieldWidget(urwid.TreeWidget):
+    indent_cols = 2
+
+    def __init__(self, node):
+        super(FieldWidget, self).__init__(node)
+        if not self.is_leaf:
+            self.expanded = node_path(node) in node.inspector.expanded
+            self.update_expanded_icon()
+
+    def get_indent_cols(self):
+        # the root isn't shown, its sections are the first level
+        return self.indent_cols * max(self.get_node().get_depth() - 1, 0)
+
+    def get_display_text(self):
+        node = self.get_node()
+        return node.inspector.display_text(node)
+
+    def prev_inorder(self):
+        widget = super(FieldWidget, self).prev_inorder()
+        if widget is not None and widget.get_node().is_root():
+            return None
+        return widget
+
+    def keypress(self, size, key):
+        if self.is_leaf:
+            return key
+        if key == 'right':
+            self.expanded = True
+        elif key == 'left':
+            self.expanded = False
+        else:
+            return key
+        self.get_node().inspector.set_expanded(self.get_node(), self.expanded)
+        self.update_expanded_icon()
+
+
+class FieldNode(urwid.TreeNode):
+    def __init__(self, value, inspector, parent=None, key=None, depth=None):
+        self.inspector = inspector
+        super(FieldNode, self).__init__(value, parent=parent, key=key, depth=depth)
+
+    def load_widget(self):
+        return FieldWidget(self)
+
+
+class SectionNode(urwid.ParentNode):
+    """
+    A dict or a list of the document, whose children are only loaded when
+    it is first expanded or walked through.
+    """
+
+    def __init__(self, value, inspector, parent=None, key=None, depth=None):
+        self.inspector = inspector
+        self.positions = {}
+        super(SectionNode, self).__init__(value, parent=parent, key=key, depth=depth)
+
+    def load_widget(self):
+        return FieldWidget(self)
+
+    def load_child_keys(self):
+        keys = self.inspector.child_keys(node_path(self), self.get_value())
+        self.positions = dict((key, position) for position, key in enumerate(keys))
+        return keys
+
+    def get_child_index(self, key):
+        # ParentNode searches the list of keys on every step
+        self.get_child_keys()
+        return self.positions.get(key)
+
+    def load_child_node(self, key):
+        value = self.inspector.simplify(key, self.get_value()[key])
+        cls = SectionNode if is_branch(value) else FieldNode
+        return cls(value, self.inspector, parent=self, key=key, depth=self.get_depth() + 1)
+
+
 class Inspector(PopupPile):
     title = "Inspection"
+    # the top level keys shown, in this order, or all of them if empty
+    sections = ()
+    # paths of the sections expanded when a document is opened
+    expand = ()
+    labels = {}
+    # joins the keys of paths in search lines
+    separator = u'.'
 
     def __init__(self, data):
+        self.data = data or {}
+        self.expanded = set(self.expand)
+        self.walker = urwid.TreeWalker(self.load())
+        self.listbox = FancyListBox(self.walker)
+        self.search = AlwaysFocusedEdit("search: ", multiline=False)
+        self.index = None
+        self.indexing = None
+        self.matches = []
         super(Inspector, self).__init__([
-            urwid.BoxAdapter(
-                FancyListBox(self.get_contents(data)),
-                int(app.screen.get_cols_rows()[1] * 0.8)
-            )
+            urwid.BoxAdapter(self.listbox, int(app.screen_size()[1] * 0.8)),
+            self.search,
         ])
 
-    def get_string_item(self, key, val, label_width):
-        return urwid.Columns([
-            (label_width, urwid.Padding(
-                urwid.Text(key, align='right'),
-                align='center', width=('relative', 80),
-            )),
-            urwid.Padding(
-                urwid.Text(unicode(val), align='left'),
-                align='center', width=('relative', 100),
-            ),
-        ])
+    def load(self):
+        """
+        Load the root of the document and return its first shown node.
+        """
+        self.root = SectionNode(self.data, self, depth=0)
+        if self.root.has_children():
+            return self.root.get_first_child()
+        return self.root
 
-    def get_list_item(self, key, vals, label_width):
-        items = []
-        for item in vals:
-            if item:
-                items.append(self.handle_item('', item, label_width))
-
-        return urwid.Columns([
-            (label_width, urwid.Padding(
-                urwid.Text(key, align='right'),
-                align='center', width=('relative', 80),
-            )),
-            urwid.Pile([urwid.Text('')] + items),
-        ])
+    def label(self, key):
+        return self.labels.get(key, key)
+
+    def display_text(self, node):
+        key, value = node.get_key(), node.get_value()
+        if node.is_root():
+            return self.title
+        if isinstance(node, SectionNode):
+            return u"%s (%d)" % (self.label(key), len(node.get_child_keys()))
+        if isinstance(key, int):
+            if isinstance(value, basestring) and '=' in value:
+                return u"%s = %s" % tuple(value.split('=', 1))
+            return unicode(value)
+        return u"%s: %s" % (self.label(key), value)
+
+    def simplify(self, key, value):
+        if key in ('Cmd', 'Entrypoint') and isinstance(value, list):
+            return u" ".join(value)
+        return value
+
+    def child_keys(self, path, value):
+        if not isinstance(value, dict):
+            return [idx for idx, item in enumerate(value) if item]
+        if not path and self.sections:
+            return [key for key in self.sections if value.get(key)]
+        return sorted(key for key, item in value.iteritems() if item)
+
+    def children(self, path, value):
+        return [
+            (key, self.simplify(key, value[key]))
+            for key in self.child_keys(path, value)
+        ]
+
+    def set_expanded(self, node, expanded):
+        if expanded:
+            self.expanded.add(node_path(node))
+        else:
+            self.expanded.discard(node_path(node))
+
+    def find(self, path):
+        """
+        Return the node at `path`, or its deepest ancestor in the document.
+        """
+        node = self.root
+        for key in path:
+            if not isinstance(node, SectionNode) or node.get_child_index(key) is None:
+                break
+            node = node.get_child_node(key)
+        return node
+
+    def get_scroll(self):
+        listbox = self.listbox.listbox
+        widget, node = self.walker.get_focus()
+        return (
+            set(self.expanded), node_path(node),
+            listbox.offset_rows, listbox.inset_fraction,
+            self.search.edit_text,
+        )
+
+    def set_scroll(self, scroll):
+        # the sections expanded in the last document stay expanded, its
+        # focus is kept if this document has it and its search goes on
+        expanded, path, offset, inset, text = scroll
+        self.search.set_edit_text(text)
+        self.search.set_edit_pos(len(text))
+        self.expanded = set(expanded)
+        first = self.load()
+        node = self.find(path)
+        if node.is_root():
+            node = first
+        path = node_path(node)
+        self.expanded.update(path[:depth] for depth in range(1, len(path)))
+        self.walker.set_focus(node)
+        self.listbox.listbox.offset_rows = offset
+        self.listbox.listbox.inset_fraction = inset
+        if text:
+            self.find_text()
+
+    def takes_key(self, key):
+        # a space only closes the dialog while nothing is being searched
+        return len(key) == 1 and (key != ' ' or bool(self.search.edit_text))
+
+    def on_close(self):
+        if self.indexing is not None:
+            self.indexing.cancel()
+
+    def keypress(self, size, event):
+        if event == 'meta enter':
+            self.jump(-1)
+        elif event == 'backspace' or len(event) == 1:
+            self.search.keypress((size[0],), event)
+            self.find_text()
+        else:
+            return super(Inspector, self).keypress(size, event)
+
+    def on_submit(self):
+        self.jump(1)
+
+    def build_index(self):
+        self.search.set_caption("search (indexing): ")
+        d = app.state.submit('dialog', DocumentIndex, self.data, self.children, self.separator)
+        d.addCallbacks(self.indexed, self.index_failed)
+        # it may have completed already
+        if not d.called:
+            self.indexing = d
+
+    def indexed(self, index):
+        self.index = index
+        self.indexing = None
+        self.find_text()
+        app.redraw()
+
+    def index_failed(self, failure):
+        self.indexing = None
+        if failure.check(defer.CancelledError):
+            return
+        # typing again tries again
+        self.search.set_caption("search (failed: %s): " % failure.getErrorMessage())
+        app.redraw()
+
+    def find_text(self):
+        if not self.search.edit_text:
+            self.matches = []
+        elif self.index is not None:
+            self.matches = self.index.search(self.search.edit_text)
+        else:
+            if self.indexing is None:
+                self.build_index()
+            return
+        self.jump(0)
 
-    def get_dict_item(self, name, data, label_width):
-        longest = 1
-        if data:
-            longest = max(len(key) for key in data) + 4
-        items = []
-        for key, val in sorted(data.items()):
-            if val:
-                items.append(self.handle_item(key, val, longest))
-        return urwid.Pile(items)
-
-    def handle_item(self, key, val, longest):
-        if val == '':
-            val = "None"
-        if val is None:
-            val = "None"
-
-        if val is "None":
-            return self.get_string_item(key, 'None', longest)
-        if (isinstance(val, unicode) or isinstance(val, str)) or isinstance(val, float) or isinstance(val, int):
-            try:
-                return self.get_string_item(key, val, longest)
-            except UnicodeEncodeError:
-                import pdb; pdb.set_trace()
-        if isinstance(val, list) or isinstance(val, tuple):
-            return self.get_list_item(key, val, longest)
-        if isinstance(val, dict) and val:
-            return self.get_dict_item(key, val, longest)
-        return urwid.Pile([])
-
-
-    def get_contents(self, data):
-        contents = []
-        longest = 0
-        if data:
-            longest = max(len(k) for k in data)
-        contents.append(self.get_dict_item('data', data, 20))
-
-        return contents
+    def jump(self, step):
+        """
+        Focus the first match after the focus, or before it if `step` is
+        negative, or at the focus itself if it is 0, wrapping around.
+        """
+        if not self.matches:
+            caption = "search (no match): " if self.search.edit_text else "search: "
+            self.search.set_caption(caption)
+            return
+        widget, node = self.walker.get_focus()
+        current = self.index.positions.get(node_path(node), -1)
+        if step < 0:
+            idx = bisect_left(self.matches, current) - 1
+        elif step > 0:
+            idx = bisect_right(self.matches, current)
+        else:
+            idx = bisect_left(self.matches, current)
+        idx %= len(self.matches)
+        self.reveal(self.index.paths[self.matches[idx]])
+        self.search.set_caption("search (%d/%d): " % (idx + 1, len(self.matches)))
 
+    def reveal(self, path):
+        for depth in range(1, len(path)):
+            self.expanded.add(path[:depth])
+            widget = self.find(path[:depth]).get_widget()
+            if not widget.expanded:
+                widget.expanded = True
+                widget.update_expanded_icon()
+        self.listbox.listbox.set_focus(self.find(path))
@@ -15,7 +15,9 @@ class FancyListBox(urwid.LineBox):
                 self.update_corners(_self.ends_visible(size))
                 return super(_FancyListBox, _self).render(size, focus)
 
-        return _FancyListBox(urwid.SimpleListWalker(items))
+        if not isinstance(items, urwid.ListWalker):
+            items = urwid.SimpleListWalker(items)
+        return _FancyListBox(items)
 
     def __init__(self, items, title="",
                  tlcorner=u'┌', tline=u' ', lline=u' ',
@@ -23,12 +25,14 @@ class FancyListBox(urwid.LineBox):
                  bline=u' ', brcorner=u'┘'):
 
         #self.length = len(items[2].contents) + 5
-        try:
-            x = items[2].contents
-        except:
-            x = items[2].get_text()[0]
-        #self.length = len(items[2].get_text()[0])
-        self.length = len(x)
+        self.length = 0
+        if isinstance(items, list) and len(items) > 2:
+            try:
+                x = items[2].contents
+            except:
+                x = items[2].get_text()[0]
+            #self.length = len(items[2].get_text()[0])
+            self.length = len(x)
         self.listbox = self.get_listbox(items)
 
         tline, bline = urwid.Divider(tline), urwid.Divider(bline)
@@ -1,18 +1,43 @@
+import time
+
 import urwid
 
+from twisted.internet import defer, reactor, task
+
 from console.app import app
+from console.ordering import OrderError, format_order, parse_order
+from console.widgets.dialogs import MessageBox, Prompt
 from console.widgets.help import HelpDialog
 
 class Pane(urwid.WidgetPlaceholder):
     """
     A widget which allows for easy display of dialogs.
 
+    Panes that display a DockerState resource name it in `resource` so that
+    it is only polled while the pane is visible, and so that its listing
+    can be sorted.
     """
 
+    resource = None
+
     def __init__(self, widget=urwid.SolidFill(' ')):
         urwid.WidgetPlaceholder.__init__(self, widget)
         self.widget = widget
         self.dialog = None
+        # the dialog shown by the latest follow-mode fetch, if still open
+        self.followed = None
+        self.prefetched = {}
+        self.generation = 0
+        self.latest = None
+        self.fetched = 0
+
+    def dialog_parameters(self, dialog):
+        return (
+            getattr(dialog, 'align', 'center'),
+            getattr(dialog, 'width', ('relative', 99)),
+            getattr(dialog, 'valign', 'middle'),
+            getattr(dialog, 'height', 'pack'),
+        )
 
     def show_dialog(self, dialog):
         if not self.dialog:
@@ -20,18 +45,59 @@ class Pane(urwid.WidgetPlaceholder):
             self.original_widget = urwid.Overlay(
                 urwid.LineBox(dialog),
                 self.original_widget,
-                align=getattr(dialog, 'align', 'center'),
-                width=getattr(dialog, 'width', ('relative', 99)),
-                valign=getattr(dialog, 'valign', 'middle'),
-                height=getattr(dialog, 'height', 'pack'),
+                *self.dialog_parameters(dialog)
             )
-            app.draw_screen()
+            app.redraw()
+
+    def swap_dialog(self, dialog):
+        """
+        Show `dialog`, the result of a follow-mode fetch, in place of the
+        one the previous fetch showed. The overlay stays mounted, and a
+        dialog of the same kind as the previous one keeps its scroll
+        position. Any other open dialog is left alone and `dialog` dropped.
+        """
+        if not self.dialog:
+            self.show_dialog(dialog)
+            self.followed = dialog
+            return
+        if self.dialog is not self.followed:
+            return
+        previous, self.dialog = self.dialog, dialog
+        self.followed = dialog
+        if hasattr(previous, 'on_close'):
+            previous.on_close()
+        if type(previous) is type(dialog) and hasattr(dialog, 'set_scroll'):
+            dialog.set_scroll(previous.get_scroll())
+        overlay = self.original_widget
+        parameters = self.dialog_parameters(dialog)
+        if parameters != self.dialog_parameters(previous):
+            overlay.set_overlay_parameters(*parameters)
+        # assigning to overlay.contents doesn't replace the top widget
+        overlay.top_w = urwid.LineBox(dialog)
+        overlay._invalidate()
+        app.redraw()
 
     def close_dialog(self):
+        # a fetch still waiting or in flight would open the dialog again
+        if self.latest is not None:
+            self.latest.cancel()
+            self.latest = None
+        self.generation += 1
+        self.followed = None
         if self.dialog:
+            if hasattr(self.dialog, 'on_close'):
+                self.dialog.on_close()
             self.original_widget = self.widget
             self.dialog = None
-            app.draw_screen()
+            app.redraw()
+
+    def on_focus(self):
+        if self.resource:
+            app.state.show(self.resource)
+
+    def on_blur(self):
+        if self.resource:
+            app.state.hide(self.resource)
 
     def keypress(self, size, event):
         if not self.handle_event(event):
@@ -41,9 +107,89 @@ class Pane(urwid.WidgetPlaceholder):
     def handle_event(self, event):
         if event == 'close-dialog':
             self.close_dialog()
+        elif event == 'sort-listing' and self.resource:
+            self.on_sort()
         else:
             return event
 
+    def fetch_latest(self, call, id, prepare=None):
+        """
+        Fetch the details a dialog shows for the row in focus, passed
+        through `prepare` on the dialog lane if given. Only the latest of
+        these requests is ever shown: a newer one cancels the previous one
+        if it is still pending, and results of older generations are
+        dropped. Calls to the daemon are spaced at least 1/`follow_rate`
+        seconds apart, a request waiting for its turn is simply replaced by
+        the next one.
+        """
+        if self.latest is not None:
+            self.latest.cancel()
+        self.generation += 1
+        delay = 0
+        if not app.state.cached(call, id):
+            delay = self.fetched + 1.0 / app.options.follow_rate - time.time()
+        if delay > 0:
+            d = task.deferLater(reactor, delay, self.fetch_now, call, id)
+        else:
+            d = self.fetch_now(call, id)
+        if prepare is not None:
+            d.addCallback(lambda result: app.state.submit('dialog', prepare, result))
+        d.addCallback(self.check_generation, self.generation)
+        self.latest = d
+        return d
+
+    def fetch_now(self, call, id):
+        if not app.state.cached(call, id):
+            self.fetched = time.time()
+        return app.state.fetch(call, id)
+
+    def check_generation(self, result, generation):
+        if generation != self.generation:
+            raise defer.CancelledError()
+        self.latest = None
+        return result
+
+    def prefetch(self, *calls):
+        """
+        Fetch the results of `calls` for the rows around the focus of
+        `listing` ahead of time, on the prefetch lane, so that they are
+        cached when the focus reaches them. Prefetches for rows that are
+        no longer around the focus are cancelled.
+        """
+        wanted = {}
+        if calls:
+            for record in self.listing.neighbors(app.options.prefetch):
+                for call in calls:
+                    key = (call, record.id)
+                    d = self.prefetched.pop(key, None)
+                    if d is None:
+                        d = app.state.fetch(call, record.id, lane='prefetch')
+                        d.addErrback(lambda failure: None)
+                    wanted[key] = d
+        for d in self.prefetched.values():
+            d.cancel()
+        self.prefetched = wanted
+
+    def on_sort(self):
+        monitor = app.state.monitors[self.resource]
+        prompt = Prompt(
+            self.perform_sort,
+            message="by %s, - for descending" % ", ".join(monitor.sort_columns),
+            title="Sort",
+            initial=format_order(monitor.sort_order),
+        )
+        self.show_dialog(prompt)
+
+    def perform_sort(self, text):
+        self.close_dialog()
+        monitor = app.state.monitors[self.resource]
+        try:
+            order = parse_order(text, monitor.sort_columns)
+        except OrderError, e:
+            self.show_dialog(MessageBox(str(e), title="Sort"))
+            return
+        app.state.sort(self.resource, order)
+
     def get_help_dialog(self):
         return HelpDialog()
 
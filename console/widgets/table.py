@@ -1,5 +1,8 @@
 import urwid
 
+from collections import OrderedDict
+
+from console.highlights import highlighter
 from console.widgets.listbox import FancyListBox
 
 class TableCell(urwid.Text):
@@ -20,6 +23,8 @@ class TableRow(urwid.AttrMap):
 
     def __init__(self, cells):
         super(TableRow, self).__init__(urwid.Columns([]), None, 'reversed')
+        self.key = None
+        self.rowdef = {}
         for cell in cells:
             self.append_cell(cell)
 
@@ -37,6 +42,120 @@ class TableRow(urwid.AttrMap):
         self.original_widget.contents.append((cell, options))
 
 
+class TableWalker(urwid.ListWalker):
+    """
+    A list walker backed by the raw records of a Table rather than by widgets.
+    TableRows are only built for the positions urwid asks for and a bounded
+    LRU of them is kept around the viewport, so swapping in a new set of
+    records never touches a widget. Position 0 is the header, if any.
+    """
+
+    def __init__(self, table, limit=200):
+        self.table = table
+        self.limit = limit
+        self.header = None
+        self.records = []
+        self.positions = {}
+        self.focus = 0
+        self.rows = OrderedDict()
+
+    @property
+    def offset(self):
+        return 1 if self.header else 0
+
+    def __len__(self):
+        return len(self.records) + self.offset
+
+    def key_at(self, position):
+        index = position - self.offset
+        if 0 <= index < len(self.records):
+            return self.table.key(self.records[index])
+
+    def position_of(self, key):
+        if self.positions is None:
+            self.positions = dict(
+                (self.table.key(record), index)
+                for index, record in enumerate(self.records)
+            )
+        index = self.positions.get(key)
+        if index is not None:
+            return index + self.offset
+
+    def get_row(self, position):
+        if self.header and position == 0:
+            return self.header
+        index = position - self.offset
+        if not 0 <= index < len(self.records):
+            return None
+        record = self.records[index]
+        key = self.table.key(record)
+        cached = self.rows.pop(key, None)
+        if cached is None:
+            row = self.table.create_row(self.table.rowdef(record))
+            row.key = key
+            self.table.bind_row(row, record)
+        else:
+            row, previous = cached
+            if previous is not record:
+                self.table.update_row(row, self.table.rowdef(record))
+                self.table.bind_row(row, record)
+        self.rows[key] = (row, record)
+        while len(self.rows) > self.limit:
+            self.rows.popitem(last=False)
+        return row
+
+    def clamp(self, position):
+        return max(0, min(position, len(self) - 1))
+
+    def set_records(self, records, positions=None):
+        """
+        Swap in `records` and return the position the focus should move to,
+        that of the row in focus if it is still there. The focus itself is
+        only kept in bounds: the Table moves it, so that the ListBox's
+        offset follows.
+        """
+        focus_key = self.key_at(self.focus)
+        self.records = records
+        self.positions = positions
+        focus = self.position_of(focus_key) if focus_key is not None else None
+        self.focus = self.clamp(self.focus)
+        self._modified()
+        return self.clamp(self.focus if focus is None else focus)
+
+    def set_header(self, header):
+        """
+        Set or remove the header and return the position the row in focus
+        moved to, the focus itself is only kept in bounds.
+        """
+        shift = bool(header) - bool(self.header)
+        self.header = header
+        focus = self.focus + shift
+        self.focus = self.clamp(self.focus)
+        self._modified()
+        return self.clamp(focus)
+
+    def get_focus(self):
+        widget = self.get_row(self.focus)
+        if widget is None:
+            return None, None
+        return widget, self.focus
+
+    def set_focus(self, position):
+        self.focus = position
+        self._modified()
+
+    def get_next(self, position):
+        widget = self.get_row(position + 1)
+        if widget is None:
+            return None, None
+        return widget, position + 1
+
+    def get_prev(self, position):
+        if position < 1:
+            return None, None
+        return self.get_row(position - 1), position - 1
+
+
 class Table(urwid.ListBox):
     """
     A Widget providing something resembling a table. The table's schema should be
@@ -47,14 +166,23 @@ class Table(urwid.ListBox):
        align - the alignment of the column (default: left)
       weight - the weight of the column for sizing (default: 1)
 
-    Rows should be provided as dictionaries, each key corresponding to a column
-    in the table's schema.
+    Rows are provided as records. By default a record is a (key, rowdef)
+    pair, the rowdef being a dictionary with a key for each column in the
+    table's schema; `key`, `rowdef` and `bind` may be passed to derive both
+    from records of any other shape and to decorate built rows.
     """
 
-    def __init__(self, schema, rows=[], header=False):
+    def __init__(self, schema, rows=[], header=False, key=None, rowdef=None, bind=None):
         self.header = None
         self.schema = schema
-        self.walker = urwid.SimpleListWalker([])
+        self.marked = set()
+        if key:
+            self.key = key
+        if rowdef:
+            self.rowdef = rowdef
+        if bind:
+            self.bind = bind
+        self.walker = TableWalker(self)
         super(Table, self).__init__(self.walker)
         if header:
             header = self.create_header()
@@ -62,11 +190,36 @@ class Table(urwid.ListBox):
         if rows:
             self.set_rows(rows)
 
+    def key(self, record):
+        return record[0]
+
+    def rowdef(self, record):
+        return record[1]
+
+    def bind(self, row, record):
+        pass
+
+    def bind_row(self, row, record):
+        self.style_row(row)
+        self.bind(row, record)
+
+    def style_row(self, row):
+        attr_style = 'focus' if row.key in self.marked else None
+        focus_style = 'reversed'
+        highlight = highlighter.style(self, row.key)
+        if highlight:
+            attr_style, focus_style = highlight
+        row.set_attr_map({None: attr_style})
+        row.set_focus_map({None: focus_style})
+
+    def restyle(self, key):
+        # rows that aren't built yet pick up their style when they are
+        if key in self.walker.rows:
+            row, record = self.walker.rows[key]
+            self.style_row(row)
+
     def clear(self):
-        if self.header:
-            self.walker[1:] = []
-        else:
-            self.walker[:] = []
+        self.set_records([])
 
     def create_header(self):
         row = TableRow([])
@@ -88,35 +241,49 @@ class Table(urwid.ListBox):
                 'weight': column.get('weight', 1),
                 'align': column.get('align', 'left'),
             })
+        row.rowdef = rowdef
         return row
 
+    def update_row(self, row, rowdef):
+        cells = row.original_widget.contents
+        for idx, column in enumerate(self.schema):
+            column_name = column['name']
+            value = rowdef.get(column_name, 'n/a')
+            if row.rowdef.get(column_name, 'n/a') != value:
+                cells[idx][0].set_text(value)
+        row.rowdef = rowdef
+
+    def set_records(self, records, positions=None):
+        """
+        Swap in a new list of records in display order. Built rows are
+        matched to records by key and reused, updating only the cells whose
+        values changed, and focus follows its row. `positions` may map keys
+        to their index in `records` if they are already known.
+        """
+        self.set_focus(self.walker.set_records(records, positions))
+        self.fix_focus()
+
     def unset_header(self):
         if self.header:
-            self.walker.pop(0)
+            self.set_focus(self.walker.set_header(None))
             self.header = None
 
     def set_header(self, header):
-        self.unset_header()
-        self.walker.insert(0, header)
+        self.set_focus(self.walker.set_header(header))
         self.header = header
+        self.fix_focus()
 
     def set_rows(self, rows):
-        self.clear()
-        for rowdef in rows:
-            row = self.create_row(rowdef)
-            self.append_row(row)
-            self.fix_focus()
-        app.draw_screen()
+        self.set_records(list(enumerate(rows)))
 
     def append_row(self, rowdef):
-        row = self.create_row(rowdef)
-        self.walker.append(row)
-        return row
+        records = self.walker.records
+        self.set_records(records + [(len(records), rowdef)])
 
     def insert_row(self, index, rowdef):
-        row = self.create_row(rowdef)
-        self.walker.insert(index, row)
-        return row
+        records = list(self.walker.records)
+        records.insert(index, (len(records), rowdef))
+        self.set_records(records)
 
     def fix_focus(self):
         widget, pos = self.get_focus()
@@ -124,7 +291,9 @@ class Table(urwid.ListBox):
             self.set_focus(1)
 
     def set_focus(self, pos):
-        super(Table, self).set_focus(max(0, min(pos, len(self.walker) - 1)))
+        if not len(self.walker):
+            return
+        super(Table, self).set_focus(self.walker.clamp(pos))
 
     def next(self):
         widget, pos = self.get_focus()
@@ -137,48 +306,54 @@ class Table(urwid.ListBox):
         else:
             self.set_focus(pos - 1)
 
+    def get_scroll(self):
+        return self.focus_position, self.offset_rows, self.inset_fraction
+
+    def set_scroll(self, scroll):
+        """
+        Restore a scroll position from `get_scroll`. Unlike set_focus, this
+        keeps the focus where it was on screen.
+        """
+        position, offset, inset = scroll
+        if position < len(self.walker):
+            self.walker.set_focus(position)
+            self.offset_rows = offset
+            self.inset_fraction = inset
+
+    def neighbors(self, radius):
+        """
+        Return the records within `radius` rows of the focus, nearest first.
+        """
+        records = self.walker.records
+        index = self.walker.focus - self.walker.offset
+        found = []
+        for distance in range(1, radius + 1):
+            for position in (index + distance, index - distance):
+                if 0 <= position < len(records):
+                    found.append(records[position])
+        return found
+
     def mark(self):
         widget, pos = self.get_focus()
-        widget.set_attr_map({None: 'focus'})
+        self.marked.add(widget.key)
+        self.style_row(widget)
 
     def unmark(self):
         widget, pos = self.get_focus()
-        widget.set_attr_map({None: None})
+        self.marked.discard(widget.key)
+        self.style_row(widget)
+
+    def unmark_all(self):
+        # rows built from now on start unmarked, only cached ones need a reset
+        marked, self.marked = self.marked, set()
+        for key in marked:
+            self.restyle(key)
 
     def keypress(self, *args, **kwargs):
         key = super(Table, self).keypress(*args, **kwargs)
         return key
 
 
-class DeadTable(urwid.Pile):
-    def __init__(self, rows=[]):
-        self.header = False
-        super(DeadTable, self).__init__(rows)
-
-    def set_header(self, row):
-        if self.header:
-            self.contents.pop(0)
-        self.insert_row(0, row)
-        self.header = True
-
-    def set_rows(self, rows):
-        if self.header:
-            self.contents[1:] = [(item, ('pack', None)) for item in rows]
-        else:
-            self.contents[:] = [(item, ('pack', None)) for item in rows]
-
-    def unset_header(self, row):
-        if self.header:
-            self.contents.pop(0)
-            self.header = False
-
-    def append_row(self, row):
-        self.contents.append((row, ('pack', None)))
-
-    def insert_row(self, index, row):
-        self.contents.insert(index, (row, ('pack', None)))
-
-
 class FancyTable(FancyListBox):
     def get_listbox(self, items):
         class _FancyListBox(Table):
@@ -22,9 +22,13 @@ class Tab(urwid.AttrMap):
     def on_focus(self):
         modemap.mode = self.label
         self.set_attr_map({None: 'reversed'})
+        if hasattr(self.content, 'on_focus'):
+            self.content.on_focus()
 
     def on_blur(self):
         self.set_attr_map({None: None})
+        if hasattr(self.content, 'on_blur'):
+            self.content.on_blur()
 
     def get_content(self):
         return urwid.SolidFill("/")
@@ -81,7 +85,7 @@ class TabFrame(urwid.Frame):
 
     def handle_event(self, event):
         if event == 'quit':
-            app.client.close()
+            app.state.close()
             raise urwid.ExitMainLoop
         elif event == 'next-tab':
             self.next_tab()
@@ -94,7 +98,11 @@ class TabFrame(urwid.Frame):
             return event
 
     def keypress(self, size, key):
-        event = modemap.event_for(key)
+        dialog = getattr(self.active_tab, 'dialog', None)
+        if hasattr(dialog, 'takes_key') and dialog.takes_key(key):
+            event = key
+        else:
+            event = modemap.event_for(key)
         if self.handle_event(event):
             return self.active_tab.keypress(size, event)
         return super(TabFrame, self).keypress(size, key)
@@ -0,0 +1,70 @@
+from twisted.internet import defer
+
+from console.app import app
+
+
+class FakeFrames(object):
+    def request(self):
+        pass
+
+
+class FakeOptions(object):
+    follow_rate = 4
+    prefetch = 2
+
+
+class FakeState(object):
+    """
+    Runs submitted calls right away, or holds them back while `paused`.
+    """
+
+    def __init__(self):
+        self.paused = False
+        self.submitted = []
+        self.results = {}
+        self.fetches = []
+
+    def cached(self, call, id):
+        return False
+
+    def fetch(self, call, id, lane='interactive'):
+        """
+        Fire with `results[call]`, or hold back while `paused`.
+        """
+        self.fetches.append((call, id))
+        if self.paused:
+            return defer.Deferred()
+        return defer.succeed(self.results[call])
+
+    def submit(self, lane, fn, *args, **kwargs):
+        self.submitted.append(lane)
+        if self.paused:
+            return defer.Deferred()
+        return defer.maybeDeferred(fn, *args, **kwargs)
+
+
+class AppTestMixin(object):
+    """
+    Stands in for the parts of the running application dialogs use.
+    """
+
+    def setUp(self):
+        self.state = FakeState()
+        self.patched = {
+            'state': self.state,
+            'frames': FakeFrames(),
+            'screen_size': lambda: (100, 40),
+            'options': FakeOptions(),
+        }
+        self.saved = dict(
+            (name, app.__dict__[name]) for name in self.patched if name in app.__dict__
+        )
+        for name, value in self.patched.items():
+            setattr(app, name, value)
+
+    def tearDown(self):
+        for name in self.patched:
+            if name in self.saved:
+                setattr(app, name, self.saved[name])
+            else:
+                delattr(app, name)
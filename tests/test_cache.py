@@ -0,0 +1,89 @@
+import unittest
+
+from twisted.internet import defer
+
+from console.cache import ResultCache
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class ResultCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = ResultCache(size=2, clock=self.clock)
+        self.calls = []
+
+    def call(self, value):
+        d = defer.Deferred()
+        self.calls.append((d, value))
+        return d
+
+    def results(self, d):
+        results = []
+        d.addBoth(results.append)
+        return results
+
+    def finish(self, idx=-1):
+        d, value = self.calls[idx]
+        d.callback(value)
+
+    def test_keeps_results(self):
+        self.results(self.cache.fetch('a', None, self.call, 1))
+        self.finish()
+        self.assertEqual(self.results(self.cache.fetch('a', None, self.call, 2)), [1])
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_shares_concurrent_fetches(self):
+        first = self.results(self.cache.fetch('a', None, self.call, 1))
+        second = self.results(self.cache.fetch('a', None, self.call, 2))
+        self.finish()
+        self.assertEqual((first, second), ([1], [1]))
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(self.cache.shared, 1)
+
+    def test_entries_expire(self):
+        self.cache.fetch('a', 5, self.call, 1)
+        self.finish()
+        self.clock.now += 5
+        self.cache.fetch('a', 5, self.call, 2)
+        self.assertEqual(len(self.calls), 2)
+
+    def test_evicts_the_least_recently_used(self):
+        for key in 'abc':
+            self.cache.fetch(key, None, self.call, key)
+            self.finish()
+            if key == 'b':
+                self.cache.fetch('a', None, self.call, 'a')
+        self.assertEqual(list(self.cache.entries), ['a', 'c'])
+
+    def test_does_not_keep_failures(self):
+        results = self.results(self.cache.fetch('a', None, self.call, 1))
+        self.calls[0][0].errback(ValueError())
+        self.assertTrue(results[0].check(ValueError))
+        self.assertEqual(self.cache.stats()['size'], 0)
+
+    def test_cancelling_the_last_waiter_cancels_the_call(self):
+        first = self.cache.fetch('a', None, self.call, 1)
+        second = self.cache.fetch('a', None, self.call, 1)
+        self.results(first)
+        self.results(second)
+        first.cancel()
+        self.assertFalse(self.calls[0][0].called)
+        second.cancel()
+        self.assertTrue(self.calls[0][0].called)
+        self.assertEqual(self.cache.pending, {})
+
+    def test_results_of_invalidated_fetches_are_not_kept(self):
+        results = self.results(self.cache.fetch('a', None, self.call, 1))
+        self.cache.invalidate('a')
+        self.finish()
+        self.assertEqual(results, [1])
+        self.cache.fetch('a', None, self.call, 2)
+        self.assertEqual(len(self.calls), 2)
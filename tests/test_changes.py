@@ -0,0 +1,37 @@
+import unittest
+
+from console.ui.containers.changes import format_counts, group_changes
+
+
+class GroupChangesTest(unittest.TestCase):
+    def setUp(self):
+        self.tree, self.kinds, self.counts = group_changes([
+            {'Path': '/etc', 'Kind': 0},
+            {'Path': '/etc/hosts', 'Kind': 0},
+            {'Path': '/etc/nginx/nginx.conf', 'Kind': 1},
+            {'Path': '/tmp/cache', 'Kind': 2},
+            {'Path': '/', 'Kind': 0},
+        ])
+
+    def test_nests_paths_by_directory(self):
+        self.assertEqual(self.tree, {
+            'etc': {'hosts': 'C', 'nginx': {'nginx.conf': 'A'}},
+            'tmp': {'cache': 'D'},
+        })
+
+    def test_keeps_the_kind_of_changed_directories(self):
+        self.assertEqual(self.kinds[('etc',)], 'C')
+        self.assertEqual(self.kinds[('etc', 'nginx', 'nginx.conf')], 'A')
+        self.assertNotIn(('etc', 'nginx'), self.kinds)
+
+    def test_counts_changes_below_each_directory(self):
+        self.assertEqual(self.counts[()], {'C': 2, 'A': 1, 'D': 1})
+        self.assertEqual(self.counts[('etc',)], {'C': 1, 'A': 1})
+        self.assertEqual(self.counts[('etc', 'nginx')], {'A': 1})
+
+    def test_unknown_kinds_are_shown_as_is(self):
+        tree, kinds, counts = group_changes([{'Path': '/x', 'Kind': 7}])
+        self.assertEqual(tree, {'x': u'7'})
+
+    def test_formats_counts_by_kind(self):
+        self.assertEqual(format_counts({'D': 1, 'A': 2}), u"A 2, D 1")
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from console.events import EventDecoder
+
+
+class EventDecoderTest(unittest.TestCase):
+    def test_objects_split_across_chunks(self):
+        decoder = EventDecoder()
+        self.assertEqual(decoder.feed(b'{"status": "start"'), [])
+        self.assertEqual(decoder.feed(b'}\n{"status": "die"}'), [
+            {'status': 'start'}, {'status': 'die'},
+        ])
+
+    def test_character_split_across_chunks(self):
+        decoder = EventDecoder()
+        data = u'{"from": "caf\xe9"}'.encode('utf-8')
+        split = data.index(b'\xc3') + 1
+        self.assertEqual(decoder.feed(data[:split]), [])
+        self.assertEqual(decoder.feed(data[split:]), [{'from': u'caf\xe9'}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+
+from twisted.internet import defer
+
+from console.executor import Lane
+
+
+class LaneTest(unittest.TestCase):
+    """
+    Exercises the queue without a running reactor: every slot of the lane
+    is taken, so submitted calls wait in the queue.
+    """
+
+    def setUp(self):
+        self.lane = Lane('test', 2)
+        self.lane.running = self.lane.limit
+
+    def tearDown(self):
+        for job in self.lane.queue:
+            job[0].addErrback(lambda failure: failure.trap(defer.CancelledError))
+        self.lane.running = 0
+        self.lane.stop()
+
+    def test_queues_calls_beyond_its_limit(self):
+        self.lane.submit(len, 'a')
+        self.lane.submit(len, 'b')
+        stats = self.lane.stats()
+        self.assertEqual((stats['queued'], stats['max_depth']), (2, 2))
+
+    def test_cancelling_drops_a_queued_call(self):
+        first = self.lane.submit(len, 'a')
+        second = self.lane.submit(len, 'b')
+        first.addErrback(lambda failure: failure.trap(defer.CancelledError))
+        first.cancel()
+        self.assertEqual([job[0] for job in self.lane.queue], [second])
+        self.assertEqual(self.lane.stats()['cancelled'], 1)
+
+    def test_passes_on_results(self):
+        d = defer.Deferred()
+        results = []
+        d.addCallback(results.append)
+        self.lane.finished(3, d)
+        self.assertEqual(results, [3])
+        self.assertEqual(self.lane.stats()['completed'], 1)
+
+    def test_discards_results_of_cancelled_calls(self):
+        d = self.lane.submit(len, 'a')
+        d.addErrback(lambda failure: failure.trap(defer.CancelledError))
+        d.cancel()
+        self.lane.finished(1, d)
+        self.assertEqual(self.lane.stats()['completed'], 1)
+
+    def test_stop_cancels_queued_calls(self):
+        d = self.lane.submit(len, 'a')
+        failures = []
+        d.addErrback(failures.append)
+        self.lane.stop()
+        self.assertTrue(failures[0].check(defer.CancelledError))
+        self.assertEqual(len(self.lane.queue), 0)
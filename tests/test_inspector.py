@@ -0,0 +1,113 @@
+import unittest
+
+from console.search import DocumentIndex
+from console.ui.containers.inspect import ContainerInspector
+from console.widgets.inspector import Inspector, node_path
+
+from tests.support import AppTestMixin
+
+DOCUMENT = {
+    'Id': 'abc',
+    'Created': 'yesterday',
+    'Config': {
+        'Env': ['PATH=/usr/bin', 'LANG=C'],
+        'Cmd': ['nginx', '-g', 'daemon off;'],
+        'Labels': {'tier': 'front'},
+        'Tty': False,
+    },
+    'HostConfig': {'Binds': ['/srv:/srv']},
+    'NetworkSettings': {'IPAddress': '172.17.0.4'},
+}
+
+
+def children(path, value):
+    if isinstance(value, dict):
+        return sorted(value.items())
+    return list(enumerate(value))
+
+
+class DocumentIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = DocumentIndex(DOCUMENT, children)
+
+    def paths(self, text):
+        return [self.index.paths[position] for position in self.index.search(text)]
+
+    def test_indexes_every_path_in_order(self):
+        self.assertEqual(self.index.paths[:3], [
+            ('Config',), ('Config', 'Cmd'), ('Config', 'Cmd', 0),
+        ])
+        self.assertEqual(self.index.positions[('Id',)], self.index.paths.index(('Id',)))
+
+    def test_substring_search_over_paths_and_values(self):
+        self.assertEqual(self.paths('172.17'), [('NetworkSettings', 'IPAddress')])
+        self.assertEqual(self.paths('TIER'), [('Config', 'Labels', 'tier')])
+
+    def test_narrowing_rechecks_the_previous_matches(self):
+        broad = self.paths('a')
+        self.assertIn(('Config', 'Env', 1), broad)
+        self.assertEqual(self.paths('lang'), [('Config', 'Env', 1)])
+        self.assertEqual(self.index.query, 'lang')
+
+    def test_prefix_search_over_paths(self):
+        self.assertEqual(self.paths('^config.env'), [
+            ('Config', 'Env'), ('Config', 'Env', 0), ('Config', 'Env', 1),
+        ])
+        self.assertEqual(self.paths('^env'), [])
+
+    def test_separator(self):
+        index = DocumentIndex(DOCUMENT, children, u'/')
+        self.assertEqual(len(index.search('^hostconfig/binds')), 2)
+
+
+class InspectorTest(AppTestMixin, unittest.TestCase):
+    def type(self, inspector, text):
+        for key in text:
+            inspector.keypress((100,), key)
+
+    def test_shows_only_its_sections(self):
+        inspector = ContainerInspector(DOCUMENT)
+        self.assertEqual(inspector.root.get_child_keys(), ['Id', 'Created', 'Config', 'HostConfig'])
+
+    def test_other_documents_show_every_key(self):
+        inspector = Inspector({'b': 1, 'a': {'c': 2}, 'd': None})
+        self.assertEqual(inspector.root.get_child_keys(), ['a', 'b'])
+
+    def test_indexes_on_the_first_search_only(self):
+        inspector = ContainerInspector(DOCUMENT)
+        self.assertEqual(self.state.submitted, [])
+        self.type(inspector, 'lang')
+        self.assertEqual(self.state.submitted, ['dialog'])
+        self.assertEqual(node_path(inspector.walker.get_focus()[1]), ('Config', 'Env', 1))
+        self.assertIn(('Config', 'Env'), inspector.expanded)
+
+    def test_closing_cancels_the_index(self):
+        self.state.paused = True
+        inspector = ContainerInspector(DOCUMENT)
+        self.type(inspector, 'x')
+        indexing = inspector.indexing
+        inspector.on_close()
+        self.assertTrue(indexing.called)
+        self.assertIs(inspector.indexing, None)
+        self.assertNotIn('failed', inspector.search.caption)
+
+    def test_failed_index_is_reported_and_retried(self):
+        inspector = ContainerInspector(DOCUMENT)
+        inspector.children = lambda path, value: 1 / 0
+        self.type(inspector, 'x')
+        self.assertIn('failed', inspector.search.caption)
+        del inspector.children
+        self.type(inspector, 'y')
+        self.assertIsNot(inspector.index, None)
+
+    def test_spaces_are_typed_while_searching(self):
+        inspector = ContainerInspector(DOCUMENT)
+        self.assertFalse(inspector.takes_key(' '))
+        self.assertTrue(inspector.takes_key('?'))
+        self.type(inspector, 'daemon')
+        self.assertTrue(inspector.takes_key(' '))
+        self.assertFalse(inspector.takes_key('up'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+
+from console.columns import ColumnStore
+from console.ordering import (
+    ListingError, OrderError, SortedListing, format_order, parse_order,
+)
+
+
+def store():
+    return ColumnStore(
+        lambda record: record[0],
+        {'age': lambda record: record[2]},
+        {'image': lambda record: record[1]},
+    )
+
+
+RECORDS = [('a', 'redis', 3), ('b', 'nginx', 1), ('c', 'redis', 2), ('d', 'nginx', 5)]
+
+
+class ParseOrderTest(unittest.TestCase):
+    def test_parses_and_formats_orders(self):
+        order = parse_order('image, -AGE', ('image', 'age'))
+        self.assertEqual(order, (('image', False), ('age', True)))
+        self.assertEqual(format_order(order), 'image -age')
+
+    def test_unknown_columns(self):
+        self.assertRaises(OrderError, parse_order, 'size', ('image', 'age'))
+
+
+class ColumnStoreTest(unittest.TestCase):
+    def test_aggregates(self):
+        columns = store().rebuild(RECORDS)
+        self.assertEqual(columns.counts('image'), {'redis': 2, 'nginx': 2})
+        self.assertEqual(columns.select('image', ['nginx']), [1, 3])
+        self.assertEqual(columns.histogram('age', [0, 2, 4, 6]), [1, 2, 1])
+
+
+class SortedListingTest(unittest.TestCase):
+    def setUp(self):
+        self.order = (('image', False), ('age', True))
+        self.listing = SortedListing(store(), self.order).reorder(RECORDS)
+
+    def ids(self, listing):
+        return [record[0] for record in listing.records]
+
+    def test_reorder(self):
+        self.assertEqual(self.ids(self.listing), ['d', 'b', 'a', 'c'])
+
+    def test_update_moves_changed_records(self):
+        listing = self.listing.update([('b', 'nginx', 1)], [('b', 'nginx', 9), ('e', 'alpine', 0)])
+        self.assertEqual(self.ids(listing), ['e', 'b', 'd', 'a', 'c'])
+        expected = self.listing.reorder(listing.records)
+        self.assertEqual(self.ids(listing), self.ids(expected))
+        # the original listing is left as it was
+        self.assertEqual(self.ids(self.listing), ['d', 'b', 'a', 'c'])
+
+    def test_update_with_an_unlisted_record(self):
+        self.assertRaises(ListingError, self.listing.update, [('z', 'redis', 3)], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import time
+import unittest
+
+import urwid
+
+from twisted.internet import task
+
+from console.widgets import pane
+from console.widgets.dialogs import MessageBox
+from console.widgets.pane import Pane
+
+from tests.support import AppTestMixin
+
+
+class FollowedDialog(urwid.ListBox):
+    def __init__(self, data):
+        self.data = data
+        super(FollowedDialog, self).__init__(urwid.SimpleListWalker([urwid.Text(data)]))
+
+
+class FollowModeTest(AppTestMixin, unittest.TestCase):
+    def setUp(self):
+        super(FollowModeTest, self).setUp()
+        self.clock = task.Clock()
+        self.reactor, pane.reactor = pane.reactor, self.clock
+        self.pane = Pane()
+        self.state.results['inspect'] = u'abc'
+
+    def tearDown(self):
+        pane.reactor = self.reactor
+        super(FollowModeTest, self).tearDown()
+
+    def follow(self, id='abc'):
+        d = self.pane.fetch_latest('inspect', id)
+        d.addCallback(lambda data: self.pane.swap_dialog(FollowedDialog(data)))
+        d.addErrback(lambda failure: None)
+        return d
+
+    def test_opens_and_swaps_the_followed_dialog(self):
+        self.follow()
+        first = self.pane.dialog
+        self.follow()
+        self.clock.advance(1)
+        self.assertIsInstance(self.pane.dialog, FollowedDialog)
+        self.assertIsNot(self.pane.dialog, first)
+
+    def test_closing_cancels_a_fetch_waiting_for_its_turn(self):
+        self.pane.fetched = time.time()
+        self.follow()
+        self.pane.close_dialog()
+        self.clock.advance(10)
+        self.assertEqual(self.state.fetches, [])
+        self.assertIsNone(self.pane.dialog)
+
+    def test_closing_cancels_a_fetch_in_flight(self):
+        self.state.paused = True
+        d = self.follow()
+        self.pane.close_dialog()
+        self.assertTrue(d.called)
+        self.assertIsNone(self.pane.latest)
+        self.assertIsNone(self.pane.dialog)
+
+    def test_late_results_leave_other_dialogs_alone(self):
+        self.pane.fetched = time.time()
+        self.follow()
+        message = MessageBox("failed", title="Error")
+        self.pane.show_dialog(message)
+        self.clock.advance(1)
+        self.assertEqual(self.state.fetches, [('inspect', 'abc')])
+        self.assertIs(self.pane.dialog, message)
@@ -0,0 +1,82 @@
+import threading
+import unittest
+
+import requests
+
+from console.pool import ClientPool
+
+
+class FakeClient(object):
+    def __init__(self, pool=None):
+        self.closed = False
+        self.alive = True
+
+    def ping(self):
+        if not self.alive:
+            raise requests.exceptions.ConnectionError()
+
+    def fail(self):
+        raise requests.exceptions.ConnectionError()
+
+    def close(self):
+        self.closed = True
+
+
+class ClientPoolTest(unittest.TestCase):
+    def test_reuses_released_clients(self):
+        pool = ClientPool(FakeClient, size=2)
+        client = pool.acquire()
+        pool.release(client)
+        self.assertIs(pool.acquire(), client)
+        self.assertEqual(pool.stats()['open'], 1)
+
+    def test_discard_wakes_a_waiter(self):
+        pool = ClientPool(FakeClient, size=1)
+        busy = pool.acquire()
+        acquired = []
+        waiter = threading.Thread(target=lambda: acquired.append(pool.acquire()))
+        waiter.daemon = True
+        waiter.start()
+        waiter.join(0.1)
+        self.assertEqual(acquired, [])
+        # a connection error while every client is busy
+        pool.discard(busy)
+        waiter.join(5)
+        self.assertEqual(len(acquired), 1)
+        self.assertIsNot(acquired[0], busy)
+        self.assertEqual(pool.stats()['open'], 1)
+
+    def test_connection_errors_discard_the_client(self):
+        pool = ClientPool(FakeClient, size=1)
+        self.assertRaises(requests.exceptions.ConnectionError, pool.call, 'fail')
+        self.assertEqual(pool.stats()['open'], 0)
+        pool.call('ping')
+        self.assertEqual(pool.stats()['open'], 1)
+
+    def test_replaces_stale_clients_in_their_slot(self):
+        pool = ClientPool(FakeClient, size=1, idle=-1)
+        client = pool.acquire()
+        client.alive = False
+        pool.release(client)
+        replacement = pool.acquire()
+        self.assertIsNot(replacement, client)
+        self.assertTrue(client.closed)
+        self.assertEqual(pool.stats()['open'], 1)
+        self.assertEqual(pool.stats()['replaced'], 1)
+
+    def test_failed_creation_frees_its_slot(self):
+        calls = []
+
+        def factory():
+            calls.append(None)
+            if len(calls) == 1:
+                raise requests.exceptions.ConnectionError()
+            return FakeClient()
+
+        pool = ClientPool(factory, size=1)
+        self.assertRaises(requests.exceptions.ConnectionError, pool.acquire)
+        self.assertIsInstance(pool.acquire(), FakeClient)
+
+
+if __name__ == '__main__':
+    unittest.main()
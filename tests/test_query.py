@@ -0,0 +1,96 @@
+import unittest
+
+from console.query import (
+    KeywordField, LabelField, NumberField, QueryError, TextField, parse_query,
+)
+from console.search import SearchIndex
+
+FIELDS = {
+    'name': TextField('names'),
+    'image': KeywordField('image'),
+    'status': KeywordField('state', ('running', 'exited'), text='status'),
+    'age': NumberField('age'),
+    'label': LabelField('labels'),
+}
+
+
+def columns(record):
+    image = record['image']
+    return {
+        'names': [record['name']],
+        'image': (image, image.rsplit(':', 1)[0]),
+        'state': (record['state'],),
+        'status': record['state'],
+        'age': record['age'],
+        'labels': record.get('labels', {}),
+    }
+
+
+RECORDS = [
+    {'name': 'web-1', 'image': 'myrepo/redis:latest', 'state': 'running', 'age': 10},
+    {'name': 'web-2', 'image': 'nginx:1.9', 'state': 'exited', 'age': 300,
+     'labels': {'tier': 'front'}},
+    {'name': 'db', 'image': 'postgres:9', 'state': 'running', 'age': 5000},
+]
+
+
+def search(text):
+    index = SearchIndex(
+        lambda record: record['name'],
+        lambda record: (record['name'], record['image']),
+        columns, FIELDS,
+    ).rebuild(RECORDS)
+    return [record['name'] for record in index.search(text)]
+
+
+class QueryTest(unittest.TestCase):
+    def test_words_match_any_searchable_string(self):
+        self.assertEqual(search('web'), ['web-1', 'web-2'])
+        self.assertEqual(search('nginx web'), ['web-2'])
+
+    def test_image_matches_by_substring(self):
+        self.assertEqual(search('image:redis'), ['web-1'])
+
+    def test_image_equality_is_exact(self):
+        self.assertEqual(search('image=redis'), [])
+        self.assertEqual(search('image=myrepo/redis'), ['web-1'])
+        self.assertEqual(parse_query('image=nginx', FIELDS).lookups, [('image', 'nginx')])
+
+    def test_keywords_use_the_lookup_table(self):
+        query = parse_query('status:running', FIELDS)
+        self.assertEqual(query.lookups, [('state', 'running')])
+        self.assertEqual(search('status:running'), ['web-1', 'db'])
+
+    def test_other_keyword_values_search_the_text_column(self):
+        self.assertEqual(search('status:exi'), ['web-2'])
+
+    def test_negation_and_numbers(self):
+        self.assertEqual(search('-status:running'), ['web-2'])
+        self.assertEqual(search('age>=300'), ['web-2', 'db'])
+
+    def test_globs_and_labels(self):
+        self.assertEqual(search('name:web-*'), ['web-1', 'web-2'])
+        self.assertEqual(search('label:tier=front'), ['web-2'])
+
+    def test_regular_expressions_ignore_case_as_typed(self):
+        self.assertEqual(search(r'name:/^\D+$/'), ['db'])
+        self.assertEqual(search(r'name:/^WEB-\d$/'), ['web-1', 'web-2'])
+        self.assertEqual(search(r'image:/:\D+$/'), ['web-1'])
+        self.assertEqual(search(r'label:tier=/^\S+$/'), ['web-2'])
+
+    def test_unknown_fields_are_words(self):
+        self.assertEqual(search('nginx:1.9'), ['web-2'])
+
+    def test_malformed_terms(self):
+        self.assertRaises(QueryError, parse_query, 'age>old', FIELDS)
+        self.assertRaises(QueryError, parse_query, 'name>3', FIELDS)
+        self.assertRaises(QueryError, parse_query, 'name:/[/', FIELDS)
+
+    def test_positive_terms_are_kept(self):
+        query = parse_query('image:redis -name:db', FIELDS)
+        self.assertEqual(query.terms, [('image', ':', 'redis')])
+        self.assertFalse(query.plain)
+
+
+if __name__ == '__main__':
+    unittest.main()
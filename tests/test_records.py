@@ -0,0 +1,51 @@
+import unittest
+
+from console.records import Container, StringTable
+
+
+def copy(string):
+    return (string + u' ')[:-1]
+
+
+class StringTableTest(unittest.TestCase):
+    def test_shares_equal_strings(self):
+        table = StringTable()
+        first = table.intern(copy(u'Up 3 minutes'))
+        self.assertIs(table.intern(copy(u'Up 3 minutes')), first)
+
+    def test_keeps_strings_of_the_previous_rotation(self):
+        table = StringTable()
+        first = table.intern(copy(u'nginx:1.9'))
+        table.rotate()
+        self.assertIs(table.intern(copy(u'nginx:1.9')), first)
+
+    def test_lets_go_of_strings_no_longer_interned(self):
+        table = StringTable()
+        table.intern(u'Up 3 minutes')
+        table.rotate()
+        table.intern(u'Up 4 minutes')
+        table.rotate()
+        table.intern(u'Up 5 minutes')
+        self.assertNotIn(u'Up 3 minutes', table.current)
+        self.assertNotIn(u'Up 3 minutes', table.previous)
+
+
+class RecordTest(unittest.TestCase):
+    def setUp(self):
+        self.record = Container(
+            id='abc', image=u'nginx', names=('/web',), status=u'Up 1 hours',
+            command=u'nginx', age=0, created=0, labels=(),
+        )
+
+    def test_is_immutable(self):
+        self.assertRaises(AttributeError, setattr, self.record, 'status', u'Exited')
+
+    def test_replace_and_changes(self):
+        changed = self.record.replace(status=u'Exited (0) 1 seconds ago')
+        self.assertEqual(changed.changes(self.record), {'status': u'Exited (0) 1 seconds ago'})
+        self.assertEqual(self.record['status'], u'Up 1 hours')
+        self.assertNotEqual(changed, self.record)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+
+from twisted.internet import defer, task
+
+from console import scheduler
+from console.scheduler import Poller
+
+
+class FakeTime(object):
+    def __init__(self, clock):
+        self.time = clock.seconds
+
+
+class PollerTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = task.Clock()
+        self.clock.advance(1000)
+        self.patched = {'reactor': self.clock, 'time': FakeTime(self.clock)}
+        self.saved = dict((name, getattr(scheduler, name)) for name in self.patched)
+        for name, value in self.patched.items():
+            setattr(scheduler, name, value)
+        self.fetches = []
+        self.poller = Poller(self.fetch, interval=1, min_interval=0.5, max_interval=4)
+
+    def tearDown(self):
+        self.poller.stop()
+        for name, value in self.saved.items():
+            setattr(scheduler, name, value)
+
+    def fetch(self):
+        d = defer.Deferred()
+        self.fetches.append(d)
+        return d
+
+    def finish(self):
+        self.fetches[-1].callback(None)
+
+    def test_joins_a_running_fetch(self):
+        self.poller.start()
+        self.poller.refresh()
+        self.assertEqual(len(self.fetches), 1)
+        self.assertEqual(self.poller.coalesced, 1)
+
+    def test_invalidating_a_running_fetch_fetches_again(self):
+        self.poller.start()
+        self.clock.advance(1)
+        self.poller.invalidate()
+        self.finish()
+        self.assertEqual(len(self.fetches), 2)
+
+    def test_folds_refreshes_within_min_interval(self):
+        self.poller.start()
+        self.finish()
+        self.poller.refresh()
+        self.poller.refresh()
+        self.assertEqual(len(self.fetches), 1)
+        self.clock.advance(0.5)
+        self.assertEqual(len(self.fetches), 2)
+
+    def test_backs_off_without_changes(self):
+        self.poller.start()
+        intervals = []
+        for _ in range(4):
+            self.finish()
+            intervals.append(self.poller.interval)
+            self.clock.advance(self.poller.interval)
+        self.assertEqual(intervals, [2, 4, 4, 4])
+
+    def test_changes_restore_the_base_interval(self):
+        self.poller.start()
+        self.finish()
+        self.clock.advance(self.poller.interval)
+        self.poller.changed()
+        self.finish()
+        self.assertEqual(self.poller.interval, 1)
+
+    def test_does_not_poll_while_suspended(self):
+        self.poller.start()
+        self.poller.suspend()
+        self.finish()
+        self.clock.advance(10)
+        self.assertEqual(len(self.fetches), 1)
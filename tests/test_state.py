@@ -0,0 +1,103 @@
+import time
+import unittest
+
+from console.state import ContainerMonitor, daemon_filters
+
+
+def container(idx, status='Up 2 hours'):
+    return {
+        'Id': '%064x' % idx,
+        'Image': 'nginx:1.9',
+        'Names': ['/web-%d' % idx],
+        'Status': status,
+        'Command': 'nginx',
+        'Created': int(time.time()) - 3600,
+        'Labels': {},
+    }
+
+
+class FakeClient(object):
+    def __init__(self):
+        self.calls = []
+
+    def containers(self, **kwargs):
+        self.calls.append(kwargs)
+        return []
+
+
+class DaemonFiltersTest(unittest.TestCase):
+    def test_translates_supported_terms(self):
+        filters = daemon_filters([
+            ('status', ':', 'exited'),
+            ('label', ':', '2=1'),
+            ('name', ':', 'web'),
+        ], '1.24')
+        self.assertEqual(filters, {
+            'status': ['exited'],
+            'label': ['2=1'],
+            'name': ['(?i)web'],
+        })
+
+    def test_only_pushes_terms_the_daemon_matches_as_broadly(self):
+        self.assertEqual(daemon_filters([('image', ':', 'nginx:1.9')], '1.24'), {})
+        self.assertEqual(daemon_filters([('image', '=', 'nginx')], '1.24'), {})
+        self.assertEqual(
+            daemon_filters([('image', '=', 'nginx:1.9')], '1.24'),
+            {'ancestor': ['nginx:1.9']},
+        )
+        self.assertEqual(daemon_filters([('name', ':', 'web*')], '1.24'), {})
+        self.assertEqual(daemon_filters([('status', '!=', 'exited')], '1.24'), {})
+
+    def test_keeps_values_the_daemon_matches_by_case_local(self):
+        # locally label:Team=Payments also holds for team=payments
+        self.assertEqual(daemon_filters([('label', ':', 'Team=Payments')], '1.24'), {})
+        self.assertEqual(daemon_filters([('label', ':', 'team=payments')], '1.24'), {})
+        self.assertEqual(daemon_filters([('image', '=', 'Nginx:1.9')], '1.24'), {})
+        self.assertEqual(daemon_filters([('image', '=', 'nginx:latest')], '1.24'), {})
+        self.assertEqual(
+            daemon_filters([('image', '=', 'localhost:5000/nginx:1.9')], '1.24'),
+            {'ancestor': ['localhost:5000/nginx:1.9']},
+        )
+        self.assertEqual(daemon_filters([('image', '=', 'localhost:5000/nginx')], '1.24'), {})
+
+    def test_respects_the_api_version(self):
+        self.assertEqual(daemon_filters([('name', ':', 'web')], '1.22'), {})
+        self.assertEqual(daemon_filters([('status', ':', 'dead')], '1.20'), {})
+
+
+class ContainerMonitorTest(unittest.TestCase):
+    def test_status_filters_dont_list_stopped_containers(self):
+        client = FakeClient()
+        monitor = ContainerMonitor(client, None)
+        monitor.list_containers(False, {'status': ['exited'], 'label': ['a']})
+        self.assertEqual(client.calls, [{'all': False, 'filters': {'label': ['a']}}])
+
+    def test_deltas_after_a_change_of_filters_are_rescoped(self):
+        monitor = ContainerMonitor(FakeClient(), None)
+        deltas = []
+        monitor.emit_containers = deltas.append
+
+        def adopt(data, scope):
+            prepared = monitor.prepare_snapshot(monitor.snapshot, monitor.listing, data)
+            monitor.adopt_snapshot(prepared, scope)
+
+        adopt([container(1), container(2)], (False, {}))
+        adopt([container(1)], (False, {'name': ['(?i)web-1']}))
+        adopt([container(1), container(2)], (False, {}))
+        adopt([container(1), container(2), container(3)], (False, {}))
+        self.assertEqual(
+            [(len(delta.added), delta.rescoped) for delta in deltas],
+            [(2, False), (0, True), (1, True), (1, False)],
+        )
+
+    def test_interned_strings_dont_outlive_their_snapshots(self):
+        monitor = ContainerMonitor(FakeClient(), None)
+        for minutes in range(10):
+            monitor.process_containers([container(1, 'Up %d minutes' % minutes)])
+        strings = set(monitor.strings.current) | set(monitor.strings.previous)
+        self.assertNotIn('Up 0 minutes', strings)
+        self.assertIn('Up 9 minutes', strings)
+
+
+if __name__ == '__main__':
+    unittest.main()
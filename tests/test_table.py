@@ -0,0 +1,66 @@
+import unittest
+
+from console.widgets.table import Table
+
+SCHEMA = [{'name': 'NAME'}, {'name': 'STATUS'}]
+SIZE = (30, 6)
+
+
+def records(names):
+    return [(name, {'NAME': name, 'STATUS': u'up'}) for name in names]
+
+
+def lines(table):
+    return [line.rstrip() for line in table.render(SIZE, focus=True).text]
+
+
+class TableTest(unittest.TestCase):
+    def setUp(self):
+        self.table = Table(SCHEMA, header=True)
+
+    def test_shows_the_header_of_an_empty_table(self):
+        self.assertEqual(self.table.get_focus()[1], 0)
+        self.assertEqual(lines(self.table)[0].split(), ['NAME', 'STATUS'])
+
+    def test_shows_the_header_of_a_long_table(self):
+        lines(self.table)
+        self.table.set_records(records('r%02d' % idx for idx in range(30)))
+        shown = lines(self.table)
+        self.assertEqual(shown[0].split(), ['NAME', 'STATUS'])
+        self.assertEqual(shown[2].split(), ['r00', 'up'])
+        self.assertEqual(self.table.get_focus()[0].key, 'r00')
+
+    def test_keeps_the_header_when_rows_are_added_above_the_focus(self):
+        names = ['r%02d' % idx for idx in range(30)]
+        self.table.set_records(records(names))
+        lines(self.table)
+        self.table.set_records(records(['new'] + names))
+        shown = lines(self.table)
+        self.assertEqual(shown[0].split(), ['NAME', 'STATUS'])
+        self.assertEqual(shown[2].split(), ['new', 'up'])
+        self.assertEqual(self.table.get_focus()[0].key, 'r00')
+
+    def test_focus_follows_its_row(self):
+        names = ['r%02d' % idx for idx in range(30)]
+        self.table.set_records(records(names))
+        self.table.set_focus(20)
+        lines(self.table)
+        self.table.set_records(records(reversed(names)))
+        shown = lines(self.table)
+        self.assertEqual(self.table.get_focus()[0].key, 'r19')
+        self.assertIn([u'r19', u'up'], [line.split() for line in shown])
+
+    def test_toggling_the_header_keeps_focus_on_a_row(self):
+        self.table.set_records(records(['a', 'b']))
+        header = self.table.header
+        self.table.unset_header()
+        self.assertEqual(self.table.get_focus()[0].key, 'a')
+        self.table.set_header(header)
+        self.assertEqual(self.table.get_focus()[0].key, 'a')
+        self.assertEqual(lines(self.table)[0].split(), ['NAME', 'STATUS'])
+
+    def test_clearing_focuses_the_header(self):
+        self.table.set_records(records(['a', 'b']))
+        self.table.clear()
+        self.assertEqual(self.table.get_focus()[1], 0)
+        self.assertEqual(lines(self.table)[0].split(), ['NAME', 'STATUS'])